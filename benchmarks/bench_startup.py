@@ -0,0 +1,70 @@
+"""Cold-start benchmark: times fresh interpreters importing the app and building the orchestrator.
+
+    python benchmarks/bench_startup.py --runs 5 --out startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import tempfile
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Each probe runs in its own interpreter so nothing is already in sys.modules
+PROBES = {
+    "import_orchestrator": "import brand_brain.orchestrator",
+    "build_orchestrator": (
+        "import tempfile; from brand_brain.orchestrator import MasterOrchestrator; "
+        "MasterOrchestrator(tempfile.mkdtemp())"
+    ),
+    "import_main": "import main",
+}
+
+TIMER = "import time; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+HEAVY_MODULES = ("anthropic", "google.generativeai", "bs4", "requests", "pandas", "httpx")
+
+
+def probe_env(workspace: str) -> dict:
+    # `import main` builds the orchestrator: keep it off the real workspace
+    return {**os.environ, "HARPSTAR_WORKSPACE_ROOT": workspace}
+
+
+def run_probe(code: str, workspace: str) -> float:
+    out = subprocess.run([sys.executable, "-c", TIMER.format(code=code)], cwd=REPO_ROOT,
+                         env=probe_env(workspace), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def heavy_modules_loaded(workspace: str) -> list:
+    code = f"import main, sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT,
+                         env=probe_env(workspace), capture_output=True, text=True, check=True)
+    return [m for m in out.stdout.strip().split(',') if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="harpstar-startup-") as workspace:
+        for name, code in PROBES.items():
+            samples = [run_probe(code, workspace) for _ in range(args.runs)]
+            results[name] = {"median_s": statistics.median(samples), "min_s": min(samples), "samples": samples}
+            print(f"{name:>22}: median {results[name]['median_s'] * 1000:8.1f} ms   min {results[name]['min_s'] * 1000:8.1f} ms")
+
+        loaded = heavy_modules_loaded(workspace)
+    results["heavy_modules_at_import"] = loaded
+    print(f"{'heavy SDKs on import':>22}: {', '.join(loaded) or 'none'}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
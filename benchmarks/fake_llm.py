@@ -0,0 +1,116 @@
+"""Local stand-ins for the Anthropic Messages API and the Gemini generateContent REST API.
+
+Both answer with canned JSON after a configurable latency, so benchmarks and load tests
+exercise the real SDK code paths without network access or API keys:
+
+    with FakeLLMServer(latency=0.2) as fake:
+        fake.apply_env()   # points ANTHROPIC_BASE_URL / GEMINI_API_ENDPOINT at the server
+"""
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MANIFEST_REPLY = {
+    "brand_identity": {"mission": "Community Intelligence", "tone": "Empowering"},
+    "active_focus": "Benchmark workspace",
+    "suggested_workflows": ["Create a launch reel from the newest media"],
+    "brand_manifest_json": {"brand_name": "Bench", "mission": "Benchmark", "voice": {"tone": "Neutral"}},
+}
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        prompt = body.decode("utf-8", "replace")
+        reply = json.dumps(MANIFEST_REPLY)
+
+        if self.path.startswith("/v1/messages"):
+            payload = {
+                "id": "msg_fake", "type": "message", "role": "assistant", "model": json.loads(body).get("model"),
+                "content": [{"type": "text", "text": reply}],
+                "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": _estimate_tokens(prompt), "output_tokens": _estimate_tokens(reply)},
+            }
+        elif ":generateContent" in self.path:
+            payload = {
+                "candidates": [{"content": {"parts": [{"text": reply}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": _estimate_tokens(prompt),
+                                  "candidatesTokenCount": _estimate_tokens(reply),
+                                  "totalTokenCount": _estimate_tokens(prompt) + _estimate_tokens(reply)},
+            }
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeLLMServer:
+    """Threaded HTTP server serving both fake providers on one local port"""
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.requests = 0
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def apply_env(self):
+        os.environ["ANTHROPIC_BASE_URL"] = self.url
+        os.environ["GEMINI_API_ENDPOINT"] = self.url
+        os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+        os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the fake Anthropic/Gemini backend")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    server = FakeLLMServer(latency=args.latency, port=args.port)
+    print(f"Fake LLM backend on {server.url} (latency {args.latency}s)")
+    server.httpd.serve_forever()
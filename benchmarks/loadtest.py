@@ -0,0 +1,283 @@
+"""HTTP/WebSocket load-test harness for the FastAPI surface in main.py.
+
+Starts the app with uvicorn against a synthetic workspace and the fake LLM backend (or targets
+an already running server with --url), then drives a scripted traffic mix of dashboard polling,
+proposals, uploads, executions, syncs and WebSocket subscribers. It reports throughput, error
+rate and p50/p95/p99 latency per endpoint:
+
+    python benchmarks/loadtest.py --scenario sync-during-peak-polling --workers 2
+    python benchmarks/loadtest.py --scenario-file my_scenario.json --out report.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import httpx
+import websockets
+
+from workspace import build_workspace
+from fake_llm import FakeLLMServer
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# mix: relative weights of user actions; events: (seconds after start, action) fired once
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "mixed": {
+        "duration": 20, "users": 20, "ws_subscribers": 20,
+        "mix": {"status": 50, "pending": 20, "propose": 10, "upload": 10, "execute": 10},
+        "events": [],
+    },
+    "peak-polling": {
+        "duration": 20, "users": 60, "ws_subscribers": 50,
+        "mix": {"status": 70, "pending": 30},
+        "events": [],
+    },
+    "sync-during-peak-polling": {
+        "duration": 25, "users": 60, "ws_subscribers": 50,
+        "mix": {"status": 70, "pending": 30},
+        "events": [[5, "sync"], [12, "sync"], [18, "propose"]],
+    },
+    "upload-burst": {
+        "duration": 20, "users": 30, "ws_subscribers": 10, "upload_kb": 1024,
+        "mix": {"upload": 70, "status": 20, "propose": 10},
+        "events": [],
+    },
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, endpoint: str, seconds: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        out = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            out[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(endpoint, 0),
+                "error_rate": self.errors.get(endpoint, 0) / len(ordered),
+                "rps": len(ordered) / elapsed,
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p95_ms": percentile(ordered, 95) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return out
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class Traffic:
+    """The user actions a scenario can mix; each records one sample per HTTP call"""
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, upload_kb: int):
+        self.client = client
+        self.recorder = recorder
+        self.upload_kb = upload_kb
+        self.pending_ids: List[str] = []
+
+    async def _call(self, endpoint: str, method: str, path: str, expected: tuple = (), **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            ok = response.status_code < 400 or response.status_code in expected
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.add(endpoint, time.perf_counter() - start, ok)
+        return response
+
+    async def status(self):
+        await self._call("GET /api/status", "GET", "/api/status")
+
+    async def pending(self):
+        response = await self._call("GET /api/workflow/pending", "GET", "/api/workflow/pending")
+        if response is not None and response.status_code == 200:
+            self.pending_ids = [w["id"] for w in response.json()["workflows"] if w.get("status") == "pending"]
+
+    async def propose(self):
+        await self._call("POST /api/workflow/propose", "POST", "/api/workflow/propose",
+                         json={"user_spark": "load test"})
+
+    async def upload(self):
+        data = os.urandom(self.upload_kb * 1024)
+        files = {"files": (f"load_{random.getrandbits(48):x}.png", data, "image/png")}
+        await self._call("POST /api/bucket/upload", "POST", "/api/bucket/upload", files=files)
+
+    async def execute(self):
+        if not self.pending_ids:
+            await self.pending()
+        if self.pending_ids:
+            workflow_id = self.pending_ids.pop(random.randrange(len(self.pending_ids)))
+            # Completed workflows leave the shared state, so a 404 means another user executed it first
+            await self._call("POST /api/workflow/execute", "POST", f"/api/workflow/execute/{workflow_id}",
+                             expected=(404,))
+
+    async def sync(self):
+        await self._call("POST /api/sync", "POST", "/api/sync")
+
+
+async def _user(traffic: Traffic, mix: Dict[str, int], deadline: float):
+    actions, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        await getattr(traffic, random.choices(actions, weights)[0])()
+
+
+async def _subscriber(url: str, deadline: float, counts: List[int]):
+    try:
+        async with websockets.connect(url, close_timeout=1) as ws:
+            while time.monotonic() < deadline:
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=max(0.1, deadline - time.monotonic()))
+                    counts[0] += 1
+                except asyncio.TimeoutError:
+                    break
+    except (OSError, websockets.WebSocketException):
+        counts[1] += 1
+
+
+async def _event(traffic: Traffic, at: float, action: str, started: float):
+    await asyncio.sleep(max(0.0, started + at - time.monotonic()))
+    await getattr(traffic, action)()
+
+
+async def run_scenario(base_url: str, scenario: Dict[str, Any]) -> Dict[str, Any]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=scenario["users"] + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        traffic = Traffic(client, recorder, scenario.get("upload_kb", 64))
+        await traffic.upload()  # make sure proposals have something to work on
+        started = time.monotonic()
+        deadline = started + scenario["duration"]
+        ws_url = base_url.replace("http", "ws", 1) + "/ws"
+        ws_counts = [0, 0]  # messages received, failed connections
+
+        subscribers = asyncio.gather(*(_subscriber(ws_url, deadline, ws_counts)
+                                       for _ in range(scenario.get("ws_subscribers", 0))))
+        tasks = [_user(traffic, scenario["mix"], deadline) for _ in range(scenario["users"])]
+        tasks += [_event(traffic, at, action, started) for at, action in scenario.get("events", [])
+                  if at < scenario["duration"]]
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+        await subscribers
+
+    endpoints = recorder.report(elapsed)
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "elapsed_s": elapsed,
+        "total_requests": total,
+        "total_rps": total / elapsed,
+        "ws": {"subscribers": scenario.get("ws_subscribers", 0), "messages": ws_counts[0], "failed": ws_counts[1]},
+        "endpoints": endpoints,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(workspace: Path, state_dir: Path, workers: int, verbose: bool = False) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {**os.environ,
+           "HARPSTAR_WORKSPACE_ROOT": str(workspace),
+           "HARPSTAR_STATE_PATH": str(state_dir / "state.db")}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+        stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            if httpx.get(f"{url}/api/status", timeout=1.0).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            raise RuntimeError("App exited during startup (rerun with --verbose for its logs)")
+        time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("App did not become ready in time")
+
+
+def print_report(name: str, result: Dict[str, Any]):
+    print(f"\nScenario '{name}': {result['total_requests']} requests in {result['elapsed_s']:.1f}s "
+          f"({result['total_rps']:.1f} req/s)")
+    print(f"{'endpoint':<30}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, e in result["endpoints"].items():
+        print(f"{endpoint:<30}{e['requests']:>7}{e['rps']:>8.1f}{e['error_rate'] * 100:>7.1f}"
+              f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}")
+    ws = result["ws"]
+    print(f"WebSocket: {ws['subscribers']} subscribers, {ws['messages']} messages received, {ws['failed']} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Harp*Star API")
+    parser.add_argument("--scenario", default="mixed", choices=sorted(SCENARIOS))
+    parser.add_argument("--scenario-file", type=Path, help="JSON scenario (same keys as SCENARIOS entries)")
+    parser.add_argument("--duration", type=float, help="override the scenario duration (seconds)")
+    parser.add_argument("--users", type=int, help="override the number of concurrent HTTP users")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local app")
+    parser.add_argument("--preset", default="small", help="synthetic workspace preset for the local app")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake provider latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="write the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own logs")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.scenario_file:
+        name, scenario = args.scenario_file.stem, json.loads(args.scenario_file.read_text())
+    else:
+        name, scenario = args.scenario, dict(SCENARIOS[args.scenario])
+    if args.duration:
+        scenario["duration"] = args.duration
+    if args.users:
+        scenario["users"] = args.users
+
+    if args.url:
+        result = asyncio.run(run_scenario(args.url.rstrip("/"), scenario))
+    else:
+        with tempfile.TemporaryDirectory(prefix="harpstar-load-") as tmp, FakeLLMServer(args.llm_latency) as fake:
+            fake.apply_env()
+            workspace = Path(tmp) / "workspace"
+            build_workspace(workspace, args.preset, args.seed)
+            proc, url = start_app(workspace, Path(tmp), args.workers, args.verbose)
+            try:
+                result = asyncio.run(run_scenario(url, scenario))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+            result["fake_llm_requests"] = fake.requests
+
+    result["scenario"] = {"name": name, **scenario}
+    print_report(name, result)
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
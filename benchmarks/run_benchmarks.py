@@ -0,0 +1,263 @@
+"""Reproducible benchmark suite for the intelligence pipeline.
+
+Builds a synthetic workspace, starts the fake Anthropic/Gemini backend and times the hot paths:
+DeepScanner.scan, learn, manifest_brand, process_bucket, save_vbrain, bucket uploads and
+WebSocket fan-out. Results are written as JSON keyed by git commit so runs can be compared:
+
+    python benchmarks/run_benchmarks.py --preset medium --llm-latency 0.05
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier>.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import logging
+import asyncio
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+os.environ.setdefault("HARPSTAR_STATE_BACKEND", "memory")
+
+from workspace import build_workspace
+from fake_llm import FakeLLMServer
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class BenchContext:
+    def __init__(self, workspace: Path, repeat: int, args: argparse.Namespace):
+        self.workspace = workspace
+        self.repeat = repeat
+        self.args = args
+
+    def orchestrator(self):
+        from brand_brain.orchestrator import MasterOrchestrator
+        from brand_brain.state import MemoryStateBackend
+        return MasterOrchestrator(str(self.workspace), state=MemoryStateBackend())
+
+    def measure(self, run: Callable[[], Any], setup: Optional[Callable[[], Any]] = None) -> List[float]:
+        """Times `run` `repeat` times; `setup` runs untimed before each sample"""
+        samples = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+
+@benchmark("scan")
+def bench_scan(ctx: BenchContext):
+    from brand_brain.synthesis import DeepScanner
+    return ctx.measure(lambda: DeepScanner(str(ctx.workspace)).scan())
+
+
+@benchmark("learn")
+def bench_learn(ctx: BenchContext):
+    orch = ctx.orchestrator()
+    return ctx.measure(orch.learn)
+
+
+@benchmark("manifest_brand")
+def bench_manifest(ctx: BenchContext):
+    orch = ctx.orchestrator()
+    orch.synth.model  # SDK import and client setup are startup cost, not per-call cost
+    return ctx.measure(orch.synth.manifest_brand)
+
+
+@benchmark("process_bucket")
+def bench_process_bucket(ctx: BenchContext):
+    orch = ctx.orchestrator()
+    return ctx.measure(orch.process_bucket)
+
+
+@benchmark("save_vbrain")
+def bench_save_vbrain(ctx: BenchContext):
+    orch = ctx.orchestrator()
+    orch.learn()
+    for i in range(ctx.args.vbrain_roots):
+        orch.vbrain["context_map"][f"/synthetic/root_{i}"] = orch.vbrain["context_map"][str(ctx.workspace)]
+    return ctx.measure(orch.save_vbrain)
+
+
+def multipart_body(files: Dict[str, bytes], field: str = "files") -> tuple:
+    """(content type, body) of a multipart/form-data request carrying `files` under `field`"""
+    boundary = os.urandom(16).hex()
+    body = io.BytesIO()
+    for name, data in files.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{name}"\r\n'
+                   f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+        body.write(data)
+        body.write(b"\r\n")
+    body.write(f"--{boundary}--\r\n".encode())
+    return f"multipart/form-data; boundary={boundary}", body.getvalue()
+
+
+async def stream_chunks(body: bytes, chunk_size: int = 64 * 1024):
+    """Yields the body in chunks, the way request.stream() hands it to save_stream()"""
+    view = memoryview(body)
+    for start in range(0, len(body), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+@benchmark("upload")
+def bench_upload(ctx: BenchContext):
+    orch = ctx.orchestrator()
+    size = ctx.args.upload_mb * 1024 * 1024
+    files = {f"bench_upload_{i}.mp4": os.urandom(size) for i in range(ctx.args.upload_files)}
+    content_type, body = multipart_body(files)
+
+    def clear_bucket():
+        for path in orch.bucket_path.glob("bench_upload_*"):
+            path.unlink()
+
+    def run():
+        # The production path: multipart parsed straight from the request stream
+        results = asyncio.run(orch.uploader.save_stream(content_type, stream_chunks(body)))
+        assert len(results) == len(files) and all(r["status"] == "stored" for r in results), results
+
+    samples = ctx.measure(run, setup=clear_bucket)
+    clear_bucket()
+    return samples
+
+
+class _FakeSocket:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+
+    async def send_json(self, message):
+        json.dumps(message)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received += 1
+
+
+@benchmark("ws_fanout")
+def bench_ws_fanout(ctx: BenchContext):
+    # main.py builds its orchestrator at import: point it at the synthetic workspace, and at ./public
+    os.environ["HARPSTAR_WORKSPACE_ROOT"] = str(ctx.workspace)
+    os.chdir(REPO_ROOT)
+    from main import ConnectionManager
+    from brand_brain.state import create_state_backend
+
+    # Same path as production: publish to the shared state, the relay task delivers to local sockets
+    state = create_state_backend(ctx.workspace / "bench_state.db", kind=ctx.args.ws_backend)
+    message = {"type": "swarm_talk", "agent": "Narrator", "message": "x" * 200, "timestamp": time.time()}
+
+    async def run():
+        manager = ConnectionManager(state)
+        sockets = [_FakeSocket(ctx.args.ws_latency) for _ in range(ctx.args.ws_clients)]
+        manager.active_connections = sockets
+        relay = asyncio.create_task(manager.relay())
+        while not manager.relaying:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)  # let the subscription reach its first poll
+        for _ in range(ctx.args.ws_messages):
+            await manager.broadcast(message)
+        while sockets[-1].received < ctx.args.ws_messages:
+            await asyncio.sleep(0.001)
+        relay.cancel()
+    return ctx.measure(lambda: asyncio.run(run()))
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "samples": samples,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline_path: Path):
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\nvs {baseline_path.name} (commit {baseline.get('commit')}):")
+    if baseline.get("workspace", {}).get("preset") != current["workspace"]["preset"] or baseline.get("params") != current["params"]:
+        print("  note: workspace preset or parameters differ, numbers are not like-for-like")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = (result["median_s"] - before["median_s"]) / before["median_s"] * 100
+        print(f"{name:>16}: {before['median_s'] * 1000:9.2f} ms -> {result['median_s'] * 1000:9.2f} ms  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Harp*Star benchmark suite")
+    parser.add_argument("--preset", default="medium", choices=["small", "medium", "large"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="run a subset")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake provider latency in seconds")
+    parser.add_argument("--vbrain-roots", type=int, default=50, help="extra roots copied into the V-Brain")
+    parser.add_argument("--upload-files", type=int, default=8)
+    parser.add_argument("--upload-mb", type=int, default=4)
+    parser.add_argument("--ws-clients", type=int, default=500)
+    parser.add_argument("--ws-messages", type=int, default=10)
+    parser.add_argument("--ws-latency", type=float, default=0.0, help="per-send delay of each fake socket")
+    parser.add_argument("--ws-backend", default="sqlite", choices=["sqlite", "memory"],
+                        help="state backend the WebSocket relay publishes through")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier result file to diff against")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # the pipeline logs every stage; keep the report readable
+
+    with tempfile.TemporaryDirectory(prefix="harpstar-bench-") as tmp, FakeLLMServer(args.llm_latency) as fake:
+        fake.apply_env()
+        workspace = Path(tmp) / "workspace"
+        shape = build_workspace(workspace, args.preset, args.seed)
+        print(f"Workspace: {shape['md_files']} markdown files, {shape['media_bytes'] // 2**20} MB media ({args.preset})")
+
+        ctx = BenchContext(workspace, args.repeat, args)
+        results = {}
+        for name in args.only or BENCHMARKS:
+            results[name] = summarize(BENCHMARKS[name](ctx))
+            print(f"{name:>16}: median {results[name]['median_s'] * 1000:9.2f} ms   min {results[name]['min_s'] * 1000:9.2f} ms")
+        shape.pop("root")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workspace": shape,
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "only")},
+        "results": results,
+    }
+    out = Path(args.out) if args.out else REPO_ROOT / "benchmarks" / "results" / f"{report['commit']}-{int(report['timestamp'])}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Synthetic workspaces for benchmarks: deep doc trees, vendored folders, large media and a loaded bucket.
+
+Everything is generated from a seed, so two runs with the same preset produce byte-identical trees.
+"""
+import json
+import random
+from pathlib import Path
+from typing import Dict, Any
+
+PRESETS = {
+    "small": {"depth": 2, "fanout": 3, "md_per_dir": 3, "media_files": 2, "media_mb": 1,
+              "vendored_files": 50, "bucket_assets": 5},
+    "medium": {"depth": 4, "fanout": 3, "md_per_dir": 5, "media_files": 4, "media_mb": 4,
+               "vendored_files": 400, "bucket_assets": 25},
+    "large": {"depth": 5, "fanout": 4, "md_per_dir": 6, "media_files": 8, "media_mb": 32,
+              "vendored_files": 3000, "bucket_assets": 100},
+}
+
+WORDS = ("community protection intelligence sovereignty liberation data equity platform launch video "
+         "campaign story voice mission ubuntu phoenix seattle empower future network signal archive").split()
+SECTIONS = ("Overview", "Mission", "Installation", "Usage", "Features", "Roadmap", "Contributing", "License")
+
+
+def _paragraph(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def markdown_doc(rng: random.Random, title: str, sections: int = 5) -> str:
+    """README-shaped markdown: badges first, then a title and several headed sections"""
+    badges = " ".join(f"[![{w}](https://img.shields.io/badge/{w}-ok-green.svg)](https://example.com/{w})"
+                      for w in rng.sample(WORDS, 6))
+    parts = [badges, "", f"# {title}", "", _paragraph(rng, 25), ""]
+    for name in rng.sample(SECTIONS, sections):
+        parts += [f"## {name}", "", _paragraph(rng), "", _paragraph(rng, 40), ""]
+        if name in ("Installation", "Usage"):
+            parts += ["```bash", "pip install -r requirements.txt", "python main.py", "```", ""]
+    return "\n".join(parts)
+
+
+def _write_tree(rng: random.Random, root: Path, depth: int, fanout: int, md_per_dir: int) -> int:
+    count = 0
+    for i in range(md_per_dir):
+        (root / f"doc_{i}.md").write_text(markdown_doc(rng, f"{root.name} doc {i}"), encoding="utf-8")
+        count += 1
+    if depth > 0:
+        for j in range(fanout):
+            child = root / f"section_{j}"
+            child.mkdir()
+            count += _write_tree(rng, child, depth - 1, fanout, md_per_dir)
+    return count
+
+
+def build_workspace(root: Path, preset: str = "medium", seed: int = 0, **overrides) -> Dict[str, Any]:
+    """Creates the workspace under `root` (which must be empty) and returns its shape"""
+    params = {**PRESETS[preset], **overrides}
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    (root / "README.md").write_text(markdown_doc(rng, "Benchmark Brand", sections=7), encoding="utf-8")
+    (root / "package.json").write_text(json.dumps({"name": "bench-brand", "version": "1.0.0"}), encoding="utf-8")
+    (root / "requirements.txt").write_text("fastapi\nuvicorn\n", encoding="utf-8")
+    (root / "Dockerfile").write_text("FROM python:3.11-slim\n", encoding="utf-8")
+    (root / "main.py").write_text("print('bench')\n", encoding="utf-8")
+
+    docs = root / "docs"
+    docs.mkdir()
+    md_files = 1 + _write_tree(rng, docs, params["depth"], params["fanout"], params["md_per_dir"])
+
+    media = root / "media"
+    media.mkdir()
+    media_bytes = params["media_mb"] * 1024 * 1024
+    for i in range(params["media_files"]):
+        ext = ".mp4" if i % 2 else ".jpg"
+        with open(media / f"clip_{i}{ext}", "wb") as f:
+            f.write(rng.randbytes(media_bytes))
+
+    # Vendored and VCS folders the scanner is expected to skip
+    for vendored in ("node_modules/pkg", ".git/objects"):
+        folder = root / vendored
+        folder.mkdir(parents=True)
+        for i in range(params["vendored_files"]):
+            name = f"README_{i}.md" if i % 4 == 0 else f"file_{i}.js"
+            (folder / name).write_text(_paragraph(rng, 20), encoding="utf-8")
+
+    bucket = root / "brand-engine" / "bucket"
+    (bucket / "processed").mkdir(parents=True)
+    for i in range(params["bucket_assets"]):
+        ext = (".png", ".jpg", ".mp4", ".webp")[i % 4]
+        (bucket / f"asset_{i}{ext}").write_bytes(rng.randbytes(4096))
+
+    return {"root": str(root), "preset": preset, "seed": seed, "md_files": md_files,
+            "media_bytes": media_bytes * params["media_files"], **params}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic workspace")
+    parser.add_argument("root")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="medium")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(build_workspace(Path(args.root), args.preset, args.seed), indent=2))
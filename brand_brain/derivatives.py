@@ -0,0 +1,148 @@
+import os
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+from .uploads import ContentIndex
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each derivative the dashboard asks for
+VARIANTS = {"thumb": 320, "preview": 1280}
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.webp', '.gif')
+VIDEO_EXTS = ('.mp4', '.mov')
+MAX_CACHE_BYTES = int(os.getenv("DERIVATIVE_CACHE_MB", "512")) * 1024 * 1024
+EVICT_GRACE = 60.0  # seconds a just-served derivative is safe from eviction, so its response can still open it
+
+
+class DerivativeUnavailable(Exception):
+    """Raised when a derivative cannot be produced for an asset (unknown type, missing ffmpeg, unreadable file)"""
+
+
+class DerivativeCache:
+    """Thumbnails and web-size previews of bucket assets, keyed by content hash.
+
+    Derivatives are JPEGs named `<sha256>-<variant>.jpg`, so renamed or moved assets
+    reuse the same file. Reads bump the file mtime and the oldest files are evicted
+    once the cache directory grows past `max_bytes` (measured on disk, so workers sharing
+    the directory share the limit). Content that fails to render is remembered
+    per digest and variant, so a corrupt upload is not decoded again on every request.
+    """
+    def __init__(self, cache_dir: Path, index: ContentIndex, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index = index
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._failed: Dict[str, str] = {}
+        self._evict_lock = threading.Lock()
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, source: Path, variant: str) -> Tuple[Path, str]:
+        """Returns (derivative path, etag), generating the derivative on first request"""
+        if variant not in VARIANTS:
+            raise DerivativeUnavailable(f"Unknown variant: {variant}")
+        digest = self.index.digest_for(source)
+        key = f"{digest}-{variant}"
+        out = self.cache_dir / f"{key}.jpg"
+
+        with self._lock_for(key):
+            if key in self._failed:
+                raise DerivativeUnavailable(self._failed[key])
+            try:
+                os.utime(out)  # LRU touch; eviction under another key's lock may have just removed it
+            except FileNotFoundError:
+                self._generate(source, out, VARIANTS[variant])
+                with self._evict_lock:
+                    self._evict(keep=out)
+        return out, f'"{key}"'
+
+    def resolve(self, source: Path, variant: str) -> Tuple[Path, str, os.stat_result]:
+        """get() plus the derivative's stat, regenerating once if the file vanished in between"""
+        for _ in range(2):
+            out, etag = self.get(source, variant)
+            try:
+                return out, etag, out.stat()
+            except FileNotFoundError:
+                continue  # removed by hand, or evicted by a worker whose grace period had passed
+        raise DerivativeUnavailable(f"Derivative of {source.name} keeps disappearing")
+
+    def warm(self, sources: List[Path]):
+        """Pre-generates every variant for freshly uploaded assets"""
+        for source in sources:
+            for variant in VARIANTS:
+                try:
+                    self.get(source, variant)
+                except (DerivativeUnavailable, OSError) as e:
+                    logger.debug(f"Skipping {variant} for {source.name}: {e}")
+
+    def _generate(self, source: Path, out: Path, edge: int):
+        suffix = source.suffix.lower()
+        tmp = out.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            if suffix not in IMAGE_EXTS + VIDEO_EXTS:
+                raise DerivativeUnavailable(f"No derivative for {suffix} files")
+            try:
+                if suffix in IMAGE_EXTS:
+                    self._render_image(source, tmp, edge)
+                else:
+                    self._render_video_frame(source, tmp, edge)
+            except DerivativeUnavailable:
+                raise
+            except Exception as e:  # corrupt/unsupported content: Pillow errors, ffmpeg exit codes and timeouts
+                self._failed[out.stem] = f"Could not render {source.name}: {e}"
+                raise DerivativeUnavailable(self._failed[out.stem]) from e
+            os.replace(tmp, out)
+            logger.info(f"🖼️ Derivative cached: {source.name} -> {out.name}")
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _render_image(source: Path, out: Path, edge: int):
+        from PIL import Image, ImageOps
+
+        with Image.open(source) as img:
+            img.draft('RGB', (edge, edge))  # lets JPEG decode at reduced scale
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((edge, edge))
+            img.convert('RGB').save(out, 'JPEG', quality=82, optimize=True, progressive=True)
+
+    @staticmethod
+    def _render_video_frame(source: Path, out: Path, edge: int):
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise DerivativeUnavailable("ffmpeg is required for video previews")
+        subprocess.run(
+            [ffmpeg, "-loglevel", "error", "-y", "-ss", "1", "-i", str(source), "-frames:v", "1",
+             "-vf", f"scale='min({edge},iw)':-2", "-f", "image2", "-c:v", "mjpeg", str(out)],
+            check=True, timeout=60
+        )
+
+    def _evict(self, keep: Path):
+        # Re-measured on every call: other workers add and evict files in the same directory
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.jpg'):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, Path(entry.path)))
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - EVICT_GRACE
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep or mtime > cutoff:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"🧹 Evicted derivative {path.name}")
@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_MARKERS = ("README.md", "package.json", ".git")
+DAY = 86400
+
+
+class RootDiscovery:
+    """Finds and ranks project folders under the usual home locations.
+
+    Child folders are inspected concurrently with one `scandir` each, the walk stops
+    once enough candidates are found or the time budget runs out, and results are
+    cached until the mtime of one of the scanned parent folders changes. Scans cut
+    short by the time budget are never cached.
+    """
+    def __init__(self, scan_dirs: Optional[List[Path]] = None, limit: int = 10,
+                 time_budget: float = 2.0, max_workers: int = 8):
+        if scan_dirs is None:
+            home = Path.home()
+            scan_dirs = [home, home / "Documents", home / "Desktop"]
+        self.scan_dirs = [Path(d) for d in scan_dirs]
+        self.limit = limit
+        self.time_budget = time_budget
+        self.max_workers = max_workers
+        # (parent fingerprint, candidates, whether every child folder was scored)
+        self._cache: Optional[Tuple[Tuple, List[Dict[str, Any]], bool]] = None
+        self._lock = threading.Lock()
+
+    def _fingerprint(self) -> Tuple:
+        fp = []
+        for d in self.scan_dirs:
+            try:
+                fp.append((str(d), d.stat().st_mtime_ns))
+            except OSError:
+                fp.append((str(d), None))
+        return tuple(fp)
+
+    @staticmethod
+    def score(path: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Scores a folder as a knowledge root; returns None if it doesn't look like a project"""
+        now = now or time.time()
+        try:
+            with os.scandir(path) as it:
+                names = {entry.name for entry in it}
+            dir_mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        markers = [m for m in PROJECT_MARKERS if m in names]
+        if not markers:
+            return None
+
+        score = 0.0
+        if "README.md" in markers:
+            score += 1.0
+        if "package.json" in markers:
+            score += 0.5
+        git_age = None
+        if ".git" in markers:
+            score += 1.0
+            for probe in ("index", "FETCH_HEAD", "HEAD"):
+                try:
+                    git_age = (now - os.stat(os.path.join(path, ".git", probe)).st_mtime) / DAY
+                    break
+                except OSError:
+                    continue
+            if git_age is not None:
+                score += 2.0 * max(0.0, 1 - git_age / 30)  # commits in the last month count most
+        score += max(0.0, 1 - (now - dir_mtime) / DAY / 90)
+        return {"path": path, "score": round(score, 3), "markers": markers,
+                "git_age_days": round(git_age, 1) if git_age is not None else None}
+
+    def _scan(self, max_candidates: int) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """Returns (candidates best-first, timed out, every child scored)"""
+        deadline = time.monotonic() + self.time_budget
+        children = []
+        for sd in self.scan_dirs:
+            try:
+                with os.scandir(sd) as it:
+                    children.extend(e.path for e in it
+                                    if not e.name.startswith('.') and e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+        found = []
+        timed_out = stopped_early = False
+        now = time.time()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = [pool.submit(self.score, child, now) for child in children]
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+                result = future.result()
+                if result:
+                    found.append(result)
+                    if len(found) >= max_candidates:
+                        stopped_early = True
+                        break
+        except TimeoutError:
+            timed_out = True
+            logger.info(f"⏱️ Root discovery hit its {self.time_budget}s budget with {len(found)} candidates")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        ranked = sorted(found, key=lambda c: c["score"], reverse=True)
+        return ranked, timed_out, not (timed_out or stopped_early)
+
+    def discover(self, exclude: List[str] = ()) -> List[Dict[str, Any]]:
+        excluded = set(exclude)
+        fingerprint = self._fingerprint()
+        with self._lock:
+            cached = self._cache
+            if cached is not None and cached[0] == fingerprint:
+                kept = [c for c in cached[1] if c["path"] not in excluded]
+                # An early-stopped scan may hold too few candidates once more roots are excluded
+                if cached[2] or len(kept) >= self.limit:
+                    return kept[:self.limit]
+            # Over-collect so the ranking still has choices after excluded roots are removed
+            candidates, timed_out, complete = self._scan(max_candidates=self.limit * 3 + len(excluded))
+            self._cache = None if timed_out else (fingerprint, candidates, complete)
+        return [c for c in candidates if c["path"] not in excluded][:self.limit]
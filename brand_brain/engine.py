@@ -1,11 +1,18 @@
 import os
-import json
-import anthropic
-import google.generativeai as genai
+import time
 from typing import Dict, Any, List
 from pathlib import Path
 import logging
 
+if not __package__:
+    # Run as a script (python brand_brain/engine.py): make the package-relative imports below resolve
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = "brand_brain"
+
+from .metrics import record_llm
+from .profile import ProfileService
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,32 +24,49 @@ class BrandContentEngine:
             base_dir = Path(__file__).parent
             profile_path = base_dir / "brand_profile.json"
         
-        with open(profile_path, 'r') as f:
-            self.profile = json.load(f)
+        # Reloaded when the file changes on disk; system prompts are cached per task type and platform
+        self.profiles = ProfileService(profile_path)
         
-        self.anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        # Provider SDKs are imported and configured on first use, not at construction
+        self._anthropic_client = None
+        self._genai = None
         
         self.asset_library_path = os.getenv("BRAND_LIBRARY_PATH", "./library")
 
-    def get_system_prompt(self, task_type: str) -> str:
-        voice = self.profile.get("voice", {})
-        phrases = ", ".join(voice.get("signature_phrases", []))
-        return f"""You are the Brand Content Engine for {self.profile['brand_name']}.
-Mission: {self.profile['mission']}
-Tone: {voice.get('tone')}
-Signature Phrases to use when appropriate: {phrases}
+    @property
+    def anthropic_client(self):
+        if self._anthropic_client is None:
+            import anthropic
+            self._anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        return self._anthropic_client
+
+    @property
+    def genai(self):
+        if self._genai is None:
+            import google.generativeai as genai
+            endpoint = os.getenv("GEMINI_API_ENDPOINT")
+            if endpoint:  # e.g. benchmarks/fake_llm.py; REST so a plain http:// endpoint works
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"), transport="rest",
+                                client_options={"api_endpoint": endpoint})
+            else:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            self._genai = genai
+        return self._genai
+
+    @property
+    def profile(self) -> Dict[str, Any]:
+        return self.profiles.profile
 
-You generate high-impact content that prioritizes community sovereignty and protection.
-"""
+    def get_system_prompt(self, task_type: str, platform: str = None) -> str:
+        return self.profiles.system_prompt(task_type, platform)
 
-    def generate_content(self, task: str, task_type: str = "default") -> Dict[str, Any]:
+    def generate_content(self, task: str, task_type: str = "default", platform: str = None) -> Dict[str, Any]:
         routing = self.profile.get("llm_routing", {})
         model_name = routing.get(task_type, routing.get("default", "gemini-1.5-flash"))
         
         logger.info(f"Generating content for task: {task} using model: {model_name}")
         
-        system_prompt = self.get_system_prompt(task_type)
+        system_prompt = self.get_system_prompt(task_type, platform)
         
         if "claude" in model_name:
             return self._generate_claude(model_name, system_prompt, task)
@@ -50,12 +74,16 @@ You generate high-impact content that prioritizes community sovereignty and prot
             return self._generate_gemini(model_name, system_prompt, task)
 
     def _generate_claude(self, model: str, system: str, prompt: str) -> Dict[str, Any]:
+        started = time.perf_counter()
         message = self.anthropic_client.messages.create(
             model=model,
             max_tokens=2048,
             system=system,
             messages=[{"role": "user", "content": prompt}]
         )
+        usage = getattr(message, "usage", None)
+        record_llm("anthropic", model, time.perf_counter() - started,
+                   getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None))
         return {
             "content": message.content[0].text,
             "model": model,
@@ -63,8 +91,12 @@ You generate high-impact content that prioritizes community sovereignty and prot
         }
 
     def _generate_gemini(self, model_name: str, system: str, prompt: str) -> Dict[str, Any]:
-        model = genai.GenerativeModel(model_name)
+        model = self.genai.GenerativeModel(model_name)
+        started = time.perf_counter()
         response = model.generate_content(f"{system}\n\nUser Task: {prompt}")
+        usage = getattr(response, "usage_metadata", None)
+        record_llm("google", model_name, time.perf_counter() - started,
+                   getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
         return {
             "content": response.text,
             "model": model_name,
@@ -84,7 +116,7 @@ You generate high-impact content that prioritizes community sovereignty and prot
         return assets
 
 if __name__ == "__main__":
-    # Quick CLI test
+    # Quick CLI test: python brand_brain/engine.py (or python -m brand_brain.engine)
     engine = BrandContentEngine()
     test_task = "Draft a community alert post about new data sovereignty tools being deployed in Seattle."
     result = engine.generate_content(test_task, task_type="analytical")
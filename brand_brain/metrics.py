@@ -0,0 +1,230 @@
+import os
+import time
+import uuid
+import inspect
+import threading
+import functools
+import contextvars
+from typing import Dict, List, Any, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("HARPSTAR_METRICS", "1").lower() not in ("0", "false", "off")
+TRACE_ALL = os.getenv("HARPSTAR_TRACE", "0").lower() in ("1", "true", "on")
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans of the current request, set only while a trace is active
+_spans: contextvars.ContextVar[Optional[List[Tuple[str, float, float]]]] = contextvars.ContextVar("spans", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_str(names: Tuple[str, ...], values: Tuple[str, ...], *extra: str) -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    parts.extend(e for e in extra if e)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self, base: str = "") -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labels, key, base)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self, base: str = "") -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _label_str(self.labels, key, base, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_str(self.labels, key, base, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_str(self.labels, key, base)} {series[-2]}")
+                lines.append(f"{self.name}_count{_label_str(self.labels, key, base)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4).
+
+        Values are per process, so every sample carries a `worker` label (the pid): with several
+        uvicorn workers each scrape is answered by one of them, and without the label their
+        counters would appear to jump backwards between scrapes.
+        """
+        base = f'worker="{os.getpid()}"'
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(base))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram("harpstar_stage_seconds", "Latency of pipeline stages", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("harpstar_stage_errors_total", "Pipeline stages that raised", ("stage",))
+LLM_SECONDS = REGISTRY.histogram("harpstar_llm_seconds", "Latency of LLM calls", ("provider", "model"))
+LLM_TOKENS = REGISTRY.counter("harpstar_llm_tokens_total", "Tokens used by LLM calls", ("provider", "model", "direction"))
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if METRICS_ENABLED:
+            STAGE_SECONDS.observe(elapsed, stage=self.stage)
+            if exc_type is not None:
+                STAGE_ERRORS.inc(stage=self.stage)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((self.stage, self.start, elapsed))
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(stage: str):
+    """Context manager timing one pipeline stage; a shared no-op when metrics and tracing are off"""
+    if not METRICS_ENABLED and _spans.get() is None:
+        return _NOOP
+    return _Timer(stage)
+
+
+def instrument(stage: str):
+    """Decorator form of `timed` for sync and async functions"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm(provider: str, model: str, seconds: float, input_tokens: Optional[int] = None,
+               output_tokens: Optional[int] = None):
+    if METRICS_ENABLED:
+        LLM_SECONDS.observe(seconds, provider=provider, model=model)
+        if input_tokens:
+            LLM_TOKENS.inc(input_tokens, provider=provider, model=model, direction="input")
+        if output_tokens:
+            LLM_TOKENS.inc(output_tokens, provider=provider, model=model, direction="output")
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((f"llm:{model}", time.perf_counter() - seconds, seconds))
+
+
+class TraceMiddleware:
+    """ASGI middleware: requests sent with `X-Trace: 1` (or all, with HARPSTAR_TRACE=1) get their
+    stage spans back in a `Server-Timing` header"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (TRACE_ALL or (b"x-trace", b"1") in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        spans: List[Tuple[str, float, float]] = []
+        token = _spans.set(spans)
+        trace_id = uuid.uuid4().hex[:16]
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # Repeated stages (e.g. one file_read per document) are folded into one entry
+                totals: Dict[str, List[float]] = {}
+                for name, _, dur in spans:
+                    entry = totals.setdefault(name.replace(':', '-'), [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += dur
+                timing = [f"total;dur={(time.perf_counter() - started) * 1000:.2f}"]
+                timing += [f'{name};desc="x{count}";dur={total * 1000:.2f}' for name, (count, total) in totals.items()]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(timing).encode()))
+                headers.append((b"x-trace-id", trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
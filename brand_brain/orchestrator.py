@@ -7,39 +7,63 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from .synthesis import BrandSynthesisEngine, DeepScanner
 from .engine import BrandContentEngine
+from .uploads import BucketUploader
+from .derivatives import DerivativeCache
+from .publish import PublishManager
+from .discovery import RootDiscovery
+from .snippets import SnippetCache
+from .metrics import instrument
+from .state import StateBackend, MemoryStateBackend, SharedMap, create_state_backend
 import uuid
+import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Unexecuted proposals are dropped from the shared state after WORKFLOW_TTL seconds, oldest first past WORKFLOW_MAX
+WORKFLOW_TTL = float(os.getenv("HARPSTAR_WORKFLOW_TTL", "86400"))
+WORKFLOW_MAX = int(os.getenv("HARPSTAR_WORKFLOW_MAX", "500"))
+
 class PlatformConnector:
     """Handles connections to external platforms"""
-    def __init__(self):
-        self.platforms = {
+    def __init__(self, state: StateBackend = None):
+        # Platform configs live in the shared state so every API worker sees custom platforms
+        self.platforms = SharedMap(state or MemoryStateBackend(), "platforms")
+        defaults = {
             "wordpress": {"status": "connected", "url": os.getenv("WORDPRESS_URL"), "type": "blog"},
             "instagram": {"status": "ready", "auth": False, "type": "social"},
             "youtube": {"status": "ready", "auth": False, "type": "video"},
             "github": {"status": "connected", "user": "hermz580", "type": "code"}
         }
+        # Built-ins come from code and env, so they are rewritten on every start instead of persisting
+        for name, config in defaults.items():
+            self.platforms[name] = config
+        self.publisher = PublishManager(self.platforms)
 
     def add_custom_platform(self, name: str, config: Dict[str, Any]):
-        self.platforms[name.lower()] = {
+        entry = {
             "status": "integrated",
             "type": config.get("type", "custom"),
             "url": config.get("url"),
+            # Posts are delivered over HTTP only to an explicit endpoint, never to the site URL
+            "webhook_url": config.get("webhook_url"),
             "api_key_ref": config.get("api_key_ref")
         }
-        return self.platforms[name.lower()]
+        # Optional publish tuning: requests/sec, burst size and JSON-array batching
+        for opt in ("rate_per_sec", "burst", "batch"):
+            if opt in config:
+                entry[opt] = config[opt]
+        self.platforms[name.lower()] = entry
+        return entry
 
-    def post(self, platform: str, content: Dict[str, Any]):
-        p = self.platforms.get(platform.lower())
-        if not p:
-            return {"status": "error", "message": f"Platform {platform} not found"}
-            
-        logger.info(f"📝 Agentic Post to {platform}: {content.get('title')}")
-        # Real integration logic would switch based on platform type/config
-        return {"status": "success", "url": p.get("url", "local_manifest_only")}
+    async def post(self, platform: str, content: Dict[str, Any], key: str = None):
+        """Queues a post on the platform's rate-limited publisher and waits for the outcome.
+        Pass a `key` (e.g. from publish.idempotency_key with a scope) to have repeats deduplicated."""
+        return await self.publisher.publish(platform, content, key)
+
+    async def post_many(self, platforms: List[str], content: Dict[str, Any], scope: str = ""):
+        """Fans the same post out to several platforms concurrently"""
+        return await self.publisher.fan_out(platforms, content, scope)
 
-from fastapi import WebSocket
 import asyncio
 
 class AgentSwarm:
@@ -114,7 +138,7 @@ class AgentSwarm:
 class MasterOrchestrator:
     """The Supreme Controller: Learns from multi-roots and acts on the Bucket"""
     
-    def __init__(self, workspace_root: str):
+    def __init__(self, workspace_root: str, state: StateBackend = None):
         self.workspace_root = Path(workspace_root)
         
         # Check if we are already in the brand-engine directory
@@ -127,47 +151,110 @@ class MasterOrchestrator:
         self.processed_path = self.project_root / "bucket" / "processed"
         self.vbrain_path = self.project_root / "brand_brain" / "vbrain.json"
         
-        self.global_focus = "General Brand Sovereignty"
-        self.discovery_paths = [str(self.workspace_root)]
-        
         # Ensure folders exist
         self.bucket_path.mkdir(parents=True, exist_ok=True)
         self.processed_path.mkdir(parents=True, exist_ok=True)
         (self.project_root / "brand_brain").mkdir(parents=True, exist_ok=True)
         
-        self.synth = BrandSynthesisEngine(str(self.workspace_root))
-        self.engine = BrandContentEngine()
-        self.platforms = PlatformConnector()
+        # Focus, proposals and platforms are shared with the other API workers through this backend
+        self.state = state or create_state_backend(self.project_root / "brand_brain" / "state.db")
+        self._synth = None
+        self._engine = None
+        self.platforms = PlatformConnector(self.state)
         self.swarm = AgentSwarm(self) # Initialize Swarm
+        # Upload dedup digests persist in cache/content_index.json, so restarts don't re-hash the bucket
+        self.uploader = BucketUploader(self.bucket_path, self.processed_path,
+                                       index_path=self.project_root / "cache" / "content_index.json")
+        self.root_discovery = RootDiscovery()
+        self.derivatives = DerivativeCache(self.project_root / "cache" / "derivatives", self.uploader.index)
+        # Markdown context snippets keyed by content hash; HARPSTAR_DOC_SUMMARIES=1 adds one LLM summary per unique doc
+        summarize = os.getenv("HARPSTAR_DOC_SUMMARIES", "0") == "1"
+        self.snippets = SnippetCache(self.project_root / "cache" / "snippets.json",
+                                     summarizer=(lambda text: self.synth.summarize_doc(text)) if summarize else None)
         
+        # Roots added at runtime are shared by every worker; the workspace root is always first
+        self.extra_roots = SharedMap(self.state, "roots")
+        self._vbrain_stamp = None
         self.vbrain = self._load_vbrain()
-        self.inspiration_urls = self.vbrain.get("inspiration_urls", [])
-        self.active_workflows = {}
+        self.active_workflows = SharedMap(self.state, "workflows")
+
+    @property
+    def discovery_paths(self) -> List[str]:
+        root = str(self.workspace_root)
+        return [root] + [p for p in self.extra_roots if p != root]
+
+    @property
+    def inspiration_urls(self) -> List[str]:
+        return self.refresh_vbrain().get("inspiration_urls", [])
+
+    @property
+    def synth(self) -> BrandSynthesisEngine:
+        """Synthesis engine, built on first use so startup never touches the LLM SDKs"""
+        if self._synth is None:
+            self._synth = BrandSynthesisEngine(str(self.workspace_root), self.snippets)
+        return self._synth
+
+    @property
+    def engine(self) -> BrandContentEngine:
+        if self._engine is None:
+            self._engine = BrandContentEngine()
+        return self._engine
+
+    @property
+    def global_focus(self) -> str:
+        return self.state.get("focus", "global", "General Brand Sovereignty")
 
     def set_focus(self, focus_text: str):
-        self.global_focus = focus_text
+        self.state.set("focus", "global", focus_text)
         logger.info(f"🎯 Global Intelligence Focus set to: {focus_text}")
         return self.global_focus
 
+    def _vbrain_stat(self):
+        try:
+            st = self.vbrain_path.stat()
+            return (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
     def _load_vbrain(self) -> Dict:
+        self._vbrain_stamp = self._vbrain_stat()
         if self.vbrain_path.exists():
             with open(self.vbrain_path, 'r') as f:
                 return json.load(f)
         return {"learned_patterns": [], "context_map": {}, "agent_integrations": {}, "workflows": [], "inspiration_urls": []}
 
+    def refresh_vbrain(self) -> Dict:
+        """Re-reads vbrain.json if another worker saved it since this one last did"""
+        if self._vbrain_stat() != self._vbrain_stamp:
+            self.vbrain = self._load_vbrain()
+        return self.vbrain
+
+    @instrument("vbrain_save")
     def save_vbrain(self):
-        with open(self.vbrain_path, 'w') as f:
+        # Merge what other workers wrote since our last read, so a save never drops their roots or URLs
+        if self._vbrain_stat() != self._vbrain_stamp:
+            disk = self._load_vbrain()
+            for key in ("context_map", "agent_integrations"):
+                self.vbrain[key] = {**disk.get(key, {}), **self.vbrain.get(key, {})}
+            urls = disk.get("inspiration_urls", [])
+            self.vbrain["inspiration_urls"] = urls + [u for u in self.vbrain.get("inspiration_urls", []) if u not in urls]
+            for key, value in disk.items():
+                self.vbrain.setdefault(key, value)
+        tmp_path = self.vbrain_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
             json.dump(self.vbrain, f, indent=2)
+        os.replace(tmp_path, self.vbrain_path)
+        self._vbrain_stamp = self._vbrain_stat()
 
     def add_discovery_path(self, path: str):
         if os.path.exists(path) and path not in self.discovery_paths:
-            self.discovery_paths.append(path)
+            self.extra_roots[path] = time.time()
             logger.info(f"📍 Added discovery path: {path}")
 
     def add_inspiration_url(self, url: str):
-        if url not in self.inspiration_urls:
-            self.inspiration_urls.append(url)
-            self.vbrain["inspiration_urls"] = self.inspiration_urls
+        urls = self.inspiration_urls
+        if url not in urls:
+            self.vbrain["inspiration_urls"] = urls + [url]
             self.save_vbrain()
             logger.info(f"🔗 Added Inspiration URL: {url}")
         return self.inspiration_urls
@@ -175,6 +262,7 @@ class MasterOrchestrator:
     def sync_dna(self):
         """Multi-root learning + External Website Synthesis"""
         logger.info("📡 Starting Deep DNA Sync...")
+        self.refresh_vbrain()
         # Manifest from both local roots and inspiration websites
         manifest = self.synth.manifest_brand(external_urls=self.inspiration_urls)
         
@@ -185,9 +273,10 @@ class MasterOrchestrator:
     def learn(self):
         """Phase 2: Machine Learning - Fingerprinting all allowed filesystems"""
         logger.info("🧠 Initializing Multi-Root Learning Phase...")
+        self.refresh_vbrain()
         all_dna = []
         for path in self.discovery_paths:
-            scanner = DeepScanner(path)
+            scanner = DeepScanner(path, self.snippets)
             discovery = scanner.scan()
             self.vbrain["context_map"][path] = discovery
             all_dna.append(discovery.get("dna_captured", []))
@@ -196,29 +285,27 @@ class MasterOrchestrator:
         self.vbrain["last_learning_session"] = time.time()
         self.save_vbrain()
 
-    def discover_system_roots(self):
-        """Searches for potential high-value roots on the system to suggest to the user"""
-        potential = []
-        user_home = Path.home()
-        # Look for common project directories
-        scan_dirs = [user_home, user_home / "Documents", user_home / "Desktop"]
-        
-        for sd in scan_dirs:
-            if sd.exists():
-                try:
-                    for item in sd.iterdir():
-                        if item.is_dir() and not item.name.startswith('.'):
-                            # Check if it looks like a project
-                            if (item / "README.md").exists() or (item / "package.json").exists() or (item / ".git").exists():
-                                if str(item) not in self.discovery_paths:
-                                    potential.append(str(item))
-                except Exception:
-                    continue
-        return potential[:10] # Return top 10 suggestions
+    def discover_system_roots(self, with_scores: bool = False):
+        """Suggests high-value project roots on the system, best-scored first (cached between calls)"""
+        candidates = self.root_discovery.discover(exclude=self.discovery_paths)
+        if with_scores:
+            return candidates
+        return [c["path"] for c in candidates]
 
+    def find_asset(self, name: str) -> Optional[Path]:
+        """Resolves an asset name to its file in the bucket or processed/"""
+        name = Path(name).name
+        for folder in (self.bucket_path, self.processed_path):
+            candidate = folder / name
+            if candidate.is_file():
+                return candidate
+        return None
+
+    @instrument("bucket_process")
     def process_bucket(self, user_spark: str = None) -> List[Dict]:
         """Scans bucket and proposes workflows based on discovered assets, DNA, and optional user steering"""
         proposals = []
+        now = time.time()
         asset_exts = ('.png', '.jpg', '.jpeg', '.mp4', '.mov', '.webp')
         
         for path in self.bucket_path.glob('*'):
@@ -237,33 +324,49 @@ class MasterOrchestrator:
                     "type": "No-Key Manifestation" if is_free else "Premium Production",
                     "description": desc,
                     "status": "pending",
-                    "free": is_free
+                    "free": is_free,
+                    "created": now
                 })
-                self.active_workflows[w_id] = proposals[-1]
-        
+
+        # One write transaction for the whole proposal batch, then drop expired proposals
+        self.active_workflows.update({wf["id"]: wf for wf in proposals})
+        stored = sorted(self.active_workflows.items(), key=lambda item: -item[1].get("created", 0))
+        expired = [w_id for i, (w_id, wf) in enumerate(stored)
+                   if i >= WORKFLOW_MAX or now - wf.get("created", 0) > WORKFLOW_TTL]
+        if expired:
+            self.active_workflows.discard(expired)
         return proposals
 
-    def execute_workflow(self, workflow_id: str):
+    def pending_workflows(self) -> List[Dict]:
+        return [wf for wf in self.active_workflows.values() if wf.get("status") == "pending"]
+
+    @instrument("workflow_execute")
+    async def execute_workflow(self, workflow_id: str):
         """Actually performs the work after approval"""
-        if workflow_id not in self.active_workflows:
+        # Shared-state reads and writes are blocking SQLite calls: keep them off the event loop
+        wf = await asyncio.to_thread(self.active_workflows.get, workflow_id)
+        if wf is None:
             return {"status": "error", "message": "Workflow not found"}
         
-        wf = self.active_workflows[workflow_id]
         wf["status"] = "executing"
+        await asyncio.to_thread(self.active_workflows.__setitem__, workflow_id, wf)
+        plan = wf.get("plan", {})
         
         results = []
-        for agent, task in wf["plan"]["tasks"]:
+        for agent, task in plan.get("tasks", []):
             logger.info(f"🤖 Agent {agent} executing: {task}")
             # Here we would call the actual agentic scripts
             results.append({"agent": agent, "status": "simulated_success"})
             
-        # Post to platform
-        platform = wf["plan"].get("platform")
-        if platform:
-            post_res = self.platforms.post(platform, {"title": wf["plan"]["title"], "body": wf["plan"]["story"]})
-            wf["post_result"] = post_res
+        # Post to every target platform at once; the workflow id scopes the idempotency keys
+        targets = plan.get("platforms") or ([plan["platform"]] if plan.get("platform") else [])
+        if targets:
+            content = {"title": plan.get("title", wf["asset"]), "body": plan.get("story", wf.get("description"))}
+            wf["post_results"] = await self.platforms.post_many(targets, content, scope=workflow_id)
             
         wf["status"] = "completed"
+        # Completed workflows leave the shared state; the caller gets the final record
+        await asyncio.to_thread(self.active_workflows.__delitem__, workflow_id)
         
         # Move asset only after full completion
         asset_path = self.bucket_path / wf["asset"]
@@ -273,6 +376,7 @@ class MasterOrchestrator:
         return wf
 
     def integrate_agent(self, name: str, url: str):
+        self.refresh_vbrain()
         self.vbrain["agent_integrations"][name] = {
             "url": url,
             "status": "ready",
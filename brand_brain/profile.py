@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Appended after the shared brand prefix, keyed like llm_routing in brand_profile.json
+TASK_GUIDANCE = {
+    "analytical": "Lead with evidence and clear reasoning. Be precise about what is known and what is not.",
+    "creative": "Be vivid and story-driven while staying true to the brand voice.",
+    "fast": "Be brief and direct. Deliver the result without preamble.",
+    "default": "",
+}
+
+
+class ProfileService:
+    """brand_profile.json with hot reload and cached system prompts.
+
+    The file is re-stat'ed at most every `poll` seconds and re-read only when its size or mtime
+    changes. A half-written or invalid file keeps the previous profile. Prompts are built from a
+    brand prefix shared by every task and platform, so the leading tokens stay identical between
+    calls and provider-side prompt caching can match them.
+    """
+    def __init__(self, path: Path, poll: float = None):
+        self.path = Path(path)
+        self.poll = poll if poll is not None else float(os.getenv("HARPSTAR_PROFILE_POLL", "1.0"))
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._key: Optional[Tuple[int, int]] = None
+        # profile, compiled blocks and rendered prompts are swapped together as one snapshot
+        self._snapshot: Dict[str, Any] = {}
+        self._reload(force=True)
+
+    @property
+    def profile(self) -> Dict[str, Any]:
+        self._reload()
+        return self._snapshot["profile"]
+
+    def _reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked < self.poll:
+            return
+        with self._lock:
+            self._checked = now
+            key = None
+            try:
+                st = self.path.stat()
+                key = (st.st_size, st.st_mtime_ns)
+                if key == self._key:
+                    return
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    profile = json.load(f)
+                compiled = self._compile(profile)
+            except (OSError, ValueError, KeyError) as e:
+                if not self._snapshot:
+                    raise
+                logger.warning(f"⚠️ Keeping previous brand profile, {self.path.name} could not be loaded: {e}")
+                self._key = key  # don't retry (and warn) until the file changes again
+                return
+            self._snapshot = {"profile": profile, "compiled": compiled, "prompts": {}}
+            self._key = key
+            if not force:
+                logger.info(f"🔄 Reloaded brand profile for {profile.get('brand_name')}")
+
+    @staticmethod
+    def _compile(profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Pre-renders the brand prefix and the per-task and per-platform blocks"""
+        voice = profile.get("voice", {})
+        phrases = ", ".join(voice.get("signature_phrases", []))
+        prefix = f"""You are the Brand Content Engine for {profile['brand_name']}.
+Mission: {profile['mission']}
+Tone: {voice.get('tone')}
+Signature Phrases to use when appropriate: {phrases}
+
+You generate high-impact content that prioritizes community sovereignty and protection.
+"""
+        hashtags = "; ".join(f"{name}: {' '.join(tags)}" for name, tags in profile.get("hashtag_clusters", {}).items())
+        tasks = {name: f"\nTask style ({name}): {text}\n" for name, text in TASK_GUIDANCE.items() if text}
+
+        platforms = {}
+        for name, template in profile.get("platform_templates", {}).items():
+            rules = []
+            if template.get("max_length"):
+                rules.append(f"- Keep the post under {template['max_length']} characters, hashtags included.")
+            if template.get("include_hashtags") and hashtags:
+                rules.append(f"- End with 2-5 hashtags chosen from these clusters: {hashtags}")
+            if template.get("include_title"):
+                rules.append("- Start with a title on its own line.")
+            if template.get("include_excerpts"):
+                rules.append("- Follow the title with a one-sentence excerpt.")
+            if template.get("aspect_ratio"):
+                rules.append(f"- Describe visuals for a {template['aspect_ratio']} aspect ratio.")
+            if rules:
+                platforms[name] = f"\nPlatform: {name}\n" + "\n".join(rules) + "\n"
+        return {"prefix": prefix, "tasks": tasks, "platforms": platforms}
+
+    def system_prompt(self, task_type: str = "default", platform: Optional[str] = None) -> str:
+        self._reload()
+        snapshot = self._snapshot
+        prompt = snapshot["prompts"].get((task_type, platform))
+        if prompt is None:
+            compiled = snapshot["compiled"]
+            prompt = (compiled["prefix"] + compiled["tasks"].get(task_type, "")
+                      + compiled["platforms"].get(platform, ""))
+            snapshot["prompts"][(task_type, platform)] = prompt
+        return prompt
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_PER_SEC = float(os.getenv("PUBLISH_RATE_PER_SEC", "2"))
+DEFAULT_BURST = int(os.getenv("PUBLISH_BURST", "5"))
+MAX_RETRIES = int(os.getenv("PUBLISH_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("PUBLISH_BACKOFF_BASE", "0.5"))
+BATCH_SIZE = int(os.getenv("PUBLISH_BATCH_SIZE", "10"))
+DEDUP_CACHE_SIZE = int(os.getenv("PUBLISH_DEDUP_CACHE", "1024"))  # completed keys remembered per process
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def idempotency_key(platform: str, content: Dict[str, Any], scope: str = "") -> str:
+    """Stable key for a (platform, content) pair, so retried or repeated ignitions post once"""
+    raw = json.dumps({"platform": platform, "scope": scope, "content": content}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`"""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PlatformQueue:
+    """One platform's outbound queue: a single worker drains jobs under its own rate limit.
+
+    Platforms configured with `"batch": True` receive up to BATCH_SIZE queued posts as
+    one JSON array; all others get one request per post.
+    """
+    def __init__(self, name: str, config: Dict[str, Any], client: "httpx.AsyncClient"):
+        self.name = name
+        self.config = config
+        self.client = client
+        self.bucket = TokenBucket(float(config.get("rate_per_sec", DEFAULT_RATE_PER_SEC)),
+                                  int(config.get("burst", DEFAULT_BURST)))
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def submit(self, content: Dict[str, Any], key: str) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((content, key, future))
+        return await future
+
+    def stop(self):
+        """Lets the worker finish what is already queued, then exit"""
+        self.queue.put_nowait(None)
+
+    def abort(self, reason: str):
+        """Fails every queued post and cancels the worker (the post being sent fails too)"""
+        while not self.queue.empty():
+            job = self.queue.get_nowait()
+            if job is not None:
+                self._fail([job], reason)
+        self.worker.cancel()
+
+    def _fail(self, jobs: List[Tuple[Dict[str, Any], str, asyncio.Future]], message: str):
+        for _, _, future in jobs:
+            if not future.done():
+                future.set_result({"status": "error", "platform": self.name, "message": message})
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            job = await self.queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            if self.config.get("batch"):
+                while len(jobs) < BATCH_SIZE and not self.queue.empty():
+                    job = self.queue.get_nowait()
+                    if job is None:
+                        stopping = True
+                        break
+                    jobs.append(job)
+            try:
+                if len(jobs) > 1:
+                    await self._send_batch(jobs)
+                else:
+                    content, key, future = jobs[0]
+                    result = await self._send([content], key)
+                    if not future.done():
+                        future.set_result(result)
+            except asyncio.CancelledError:
+                self._fail(jobs, "publisher closed")
+                raise
+            except Exception as e:
+                self._fail(jobs, str(e))
+            finally:
+                for _ in jobs:
+                    self.queue.task_done()
+
+    async def _send_batch(self, jobs: List[Tuple[Dict[str, Any], str, asyncio.Future]]):
+        batch_key = hashlib.sha256("".join(k for _, k, _ in jobs).encode()).hexdigest()[:32]
+        result = await self._send([c for c, _, _ in jobs], batch_key)
+        for _, key, future in jobs:
+            if not future.done():
+                future.set_result({**result, "idempotency_key": key, "batch_key": batch_key})
+
+    async def _send(self, contents: List[Dict[str, Any]], key: str) -> Dict[str, Any]:
+        import httpx
+
+        url = self.config["webhook_url"]
+        headers = {"Idempotency-Key": key}
+        if self.config.get("api_key_ref"):
+            token = os.getenv(self.config["api_key_ref"])
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+        body = contents if self.config.get("batch") else contents[0]
+
+        for attempt in range(MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                response = await self.client.post(url, json=body, headers=headers)
+                if response.status_code < 400:
+                    logger.info(f"📝 Published to {self.name} ({len(contents)} post(s), attempt {attempt + 1})")
+                    return {"status": "success", "platform": self.name, "url": url,
+                            "http_status": response.status_code, "idempotency_key": key}
+                if response.status_code not in RETRY_STATUSES:
+                    return {"status": "error", "platform": self.name, "http_status": response.status_code,
+                            "message": response.text[:200], "idempotency_key": key}
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("retry-after")
+            except httpx.TransportError as e:
+                error = str(e) or e.__class__.__name__
+
+            if attempt == MAX_RETRIES:
+                break
+            delay = BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            logger.warning(f"🔁 {self.name} publish failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        return {"status": "error", "platform": self.name, "message": error, "idempotency_key": key}
+
+
+class PublishManager:
+    """Per-platform async queues sharing one pooled HTTP client, with idempotent fan-out"""
+    def __init__(self, platforms: Dict[str, Dict[str, Any]]):
+        self.platforms = platforms
+        self._queues: Dict[str, PlatformQueue] = {}
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._completed: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # LRU of delivered keys
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _bind_loop(self):
+        # Queues, futures and the client belong to one event loop; start fresh if it changed
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            import httpx  # deferred until the first real post to keep startup lean
+            old_client, old_loop = self._client, self._loop
+            self._loop = loop
+            self._queues = {}
+            self._inflight = {}
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+            if old_client is not None:
+                await self._retire_client(old_client, old_loop)
+
+    @staticmethod
+    async def _retire_client(client: "httpx.AsyncClient", loop: Optional[asyncio.AbstractEventLoop]):
+        """Closes a client left behind by the previous event loop"""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)  # that loop still runs: close it there
+            return
+        try:
+            await client.aclose()
+        except Exception as e:  # pooled connections may belong to a loop that is already closed
+            logger.debug(f"Previous publish client closed uncleanly: {e}")
+
+    def _queue_for(self, name: str, config: Dict[str, Any]) -> PlatformQueue:
+        queue = self._queues.get(name)
+        if queue is None or queue.config != config:
+            if queue is not None:
+                queue.stop()
+            queue = PlatformQueue(name, config, self._client)
+            self._queues[name] = queue
+        return queue
+
+    async def publish(self, platform: str, content: Dict[str, Any], key: Optional[str] = None) -> Dict[str, Any]:
+        """Posts `content`; only posts sharing a caller-supplied `key` are deduplicated"""
+        await self._bind_loop()
+        name = platform.lower()
+        config = await asyncio.to_thread(self.platforms.get, name)  # shared-state read, off the loop
+        if not config:
+            return {"status": "error", "message": f"Platform {platform} not found"}
+        dedup = key is not None
+        key = key or uuid.uuid4().hex  # still sent as Idempotency-Key, so retries of this post stay safe
+
+        if dedup and key in self._completed:
+            self._completed.move_to_end(key)
+            return {**self._completed[key], "deduplicated": True}
+        if dedup and key in self._inflight:
+            return {**(await asyncio.shield(self._inflight[key])), "deduplicated": True}
+
+        if not config.get("webhook_url"):  # "url" is the platform's site, not somewhere to POST
+            logger.info(f"📝 Agentic Post to {platform}: {content.get('title')}")
+            return {"status": "success", "url": "local_manifest_only"}
+
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._queue_for(name, config).submit(content, key)
+        except BaseException as e:
+            result = {"status": "error", "platform": name, "message": str(e)}
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(result)
+        if dedup and result.get("status") == "success":
+            self._completed[key] = result
+            if len(self._completed) > DEDUP_CACHE_SIZE:
+                self._completed.popitem(last=False)
+        return result
+
+    async def fan_out(self, platforms: List[str], content: Dict[str, Any], scope: str = "") -> Dict[str, Dict[str, Any]]:
+        """Publishes the same content to many platforms concurrently; a `scope` (e.g. workflow id) makes it idempotent"""
+        results = await asyncio.gather(*(
+            self.publish(p, content, idempotency_key(p.lower(), content, scope) if scope else None) for p in platforms
+        ))
+        return dict(zip(platforms, results))
+
+    async def close(self):
+        for queue in self._queues.values():
+            queue.abort("publisher closed")
+        await asyncio.gather(*(q.worker for q in self._queues.values()), return_exceptions=True)
+        self._queues = {}
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_BUDGET = 2000  # characters of context kept per document
+SECTION_SHARE = 0.4  # no single section takes more than this fraction of the budget
+CACHE_VERSION = 2  # bump when extraction changes, so cached snippets are rebuilt
+HIGH_SIGNAL = ("about", "overview", "mission", "vision", "introduction", "intro", "what", "why", "feature",
+               "brand", "story", "purpose", "summary", "goal", "value", "audience", "philosophy", "description")
+LOW_SIGNAL = ("install", "setup", "license", "contribut", "changelog", "build", "test", "requirement",
+              "getting started", "usage", "faq", "acknowledg", "contents", "credits", "deploy", "develop")
+# Keywords must start a word ("test" matches "Testing", not "Latest")
+HIGH_SIGNAL_RE = re.compile(r'\b(?:' + '|'.join(HIGH_SIGNAL) + ')')
+LOW_SIGNAL_RE = re.compile(r'\b(?:' + '|'.join(LOW_SIGNAL) + ')')
+# Headings naming code (`backticks`, paths, file names) describe implementation, not the brand
+CODE_HEADING = re.compile(r'`|\w/\w|\b\w+\.(?:py|js|ts|tsx|json|md|sh|ya?ml|toml|html|css)\b')
+
+HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+FENCE = re.compile(r'^\s*(```|~~~)')
+LINKED_IMAGE = re.compile(r'\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)')
+IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+LINK = re.compile(r'\[([^\]]+)\]\([^)]*\)')
+HTML_TAG = re.compile(r'<[^>]+>')
+WHITESPACE = re.compile(r'[ \t]+')
+
+
+def split_sections(text: str) -> List[Tuple[str, int, str]]:
+    """Splits markdown into (heading, level, body) sections; text before the first heading has level 0.
+    Fenced code is dropped: it rarely says anything about the brand."""
+    sections = [["", 0, []]]
+    in_fence = False
+    for line in text.splitlines():
+        if FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = HEADING.match(line)
+        if match:
+            sections.append([match.group(2), len(match.group(1)), []])
+        else:
+            sections[-1][2].append(line)
+    return [(h, lvl, "\n".join(body)) for h, lvl, body in sections]
+
+
+def clean_markdown(body: str) -> str:
+    """Removes badges, images and HTML, keeps link text, and collapses blank runs"""
+    body = LINKED_IMAGE.sub('', body)
+    body = IMAGE.sub('', body)
+    body = LINK.sub(r'\1', body)
+    body = HTML_TAG.sub('', body)
+    lines = [WHITESPACE.sub(' ', line).strip() for line in body.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', "\n".join(lines)).strip()
+
+
+def score_section(heading: str, level: int, body: str, position: int) -> float:
+    words = len(body.split())
+    if words < 5:
+        return 0.0
+    name = heading.lower()
+    score = min(words, 150) / 150
+    if CODE_HEADING.search(name):
+        score -= 0.5
+    else:
+        if HIGH_SIGNAL_RE.search(name):
+            score += 1.5
+        if LOW_SIGNAL_RE.search(name):
+            score -= 1.0
+    if level <= 1:
+        score += 0.75  # title/preamble usually states what the project is
+    return score + max(0.0, 0.5 - position * 0.1)
+
+
+def extract_snippet(text: str, budget: int = SNIPPET_BUDGET) -> Tuple[str, float]:
+    """Highest-signal sections of a markdown document, in document order, within `budget` chars.
+    Returns the snippet and the score of its best section."""
+    candidates = []
+    for position, (heading, level, body) in enumerate(split_sections(text)):
+        cleaned = clean_markdown(body)
+        score = score_section(heading, level, cleaned, position)
+        if score > 0:
+            candidates.append((score, position, heading, cleaned))
+    if not candidates:
+        return clean_markdown(text)[:budget], 0.0
+
+    chosen, used = [], 0
+    cap = int(budget * SECTION_SHARE)
+    for score, position, heading, cleaned in sorted(candidates, key=lambda c: -c[0]):
+        block = f"## {heading}\n{cleaned}" if heading else cleaned
+        room = min(budget - used, cap)
+        if budget - used < 200:
+            break
+        if len(block) > room:
+            cut = block[:room]
+            block = cut[:cut.rfind('. ') + 1] if '. ' in cut else cut
+        chosen.append((position, block))
+        used += len(block) + 2
+    snippet = "\n\n".join(block for _, block in sorted(chosen))
+    return snippet, max(c[0] for c in candidates)
+
+
+class SnippetCache:
+    """Snippets and optional model summaries of markdown files, keyed by content hash.
+
+    A second index maps path -> (size, mtime) -> hash, so unchanged files are served without
+    being read at all; identical content at different paths shares one entry (and one LLM call).
+    Pass `path=None` for a process-local cache.
+    """
+    def __init__(self, path: Optional[Path] = None, summarizer: Optional[Callable[[str], str]] = None):
+        self.path = Path(path) if path else None
+        self.summarizer = summarizer
+        self._by_hash: Dict[str, Dict[str, Any]] = {}
+        self._by_stat: Dict[str, List[Any]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+                if data.get("version") == CACHE_VERSION:
+                    self._by_hash = data.get("by_hash", {})
+                    self._by_stat = data.get("by_stat", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable snippet cache {self.path}: {e}")
+
+    def get(self, path: Path) -> Dict[str, Any]:
+        """Returns {"snippet", "score", "sha256"[, "summary"]} for a markdown file"""
+        st = path.stat()
+        key = str(path.resolve())
+        known = self._by_stat.get(key)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns and known[2] in self._by_hash:
+            entry = self._by_hash[known[2]]
+            if entry.get("summary") or not self.summarizer:
+                return entry
+
+        with timed("file_read"):
+            raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        entry = self._by_hash.get(digest)
+        if entry is None:
+            snippet, score = extract_snippet(raw.decode('utf-8', errors='replace'))
+            entry = {"snippet": snippet, "score": round(score, 3), "sha256": digest}
+        if self.summarizer and not entry.get("summary"):
+            try:
+                entry = {**entry, "summary": self.summarizer(entry["snippet"])}
+            except Exception as e:
+                logger.warning(f"Summary failed for {path.name}: {e}")
+        with self._lock:
+            self._by_hash[digest] = entry
+            self._by_stat[key] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+        return entry
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            live = {v[2] for v in self._by_stat.values()}
+            data = {"version": CACHE_VERSION, "by_stat": self._by_stat,
+                    "by_hash": {k: v for k, v in self._by_hash.items() if k in live}}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding='utf-8')
+            os.replace(tmp, self.path)
+            self._dirty = False
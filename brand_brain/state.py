@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from collections.abc import MutableMapping
+from typing import Dict, List, Any, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+STATE_BACKEND = os.getenv("HARPSTAR_STATE_BACKEND", "sqlite")  # "sqlite" or "memory"
+STATE_PATH = os.getenv("HARPSTAR_STATE_PATH")
+POLL_INTERVAL = float(os.getenv("HARPSTAR_STATE_POLL", "0.05"))
+EVENT_RETENTION = 60.0  # seconds a published event stays visible to slow subscribers
+
+
+class StateBackend(ABC):
+    """Key/value namespaces plus pub/sub channels shared by every API worker on a host"""
+    @abstractmethod
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any):
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        ...
+
+    @abstractmethod
+    def set_many(self, namespace: str, values: Dict[str, Any]):
+        """Writes several keys at once (one transaction where the backend has them)"""
+
+    @abstractmethod
+    def delete_many(self, namespace: str, keys: List[str]):
+        ...
+
+    @abstractmethod
+    def items(self, namespace: str) -> List[tuple]:
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        ...
+
+
+class MemoryStateBackend(StateBackend):
+    """Single-process backend for tests and one-worker runs"""
+    def __init__(self):
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def get(self, namespace, key, default=None):
+        raw = self._data.get(namespace, {}).get(key)
+        return default if raw is None else json.loads(raw)
+
+    def set(self, namespace, key, value):
+        self._data.setdefault(namespace, {})[key] = json.dumps(value)
+
+    def delete(self, namespace, key):
+        self._data.get(namespace, {}).pop(key, None)
+
+    def set_many(self, namespace, values):
+        for key, value in values.items():
+            self.set(namespace, key, value)
+
+    def delete_many(self, namespace, keys):
+        for key in keys:
+            self.delete(namespace, key)
+
+    def items(self, namespace):
+        return [(k, json.loads(v)) for k, v in self._data.get(namespace, {}).items()]
+
+    async def publish(self, channel, message):
+        for queue in self._subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel):
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].remove(queue)
+
+
+class SQLiteStateBackend(StateBackend):
+    """SQLite (WAL) backend: workers share rows through the file and poll an events table for pub/sub"""
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (namespace TEXT, key TEXT, value TEXT, PRIMARY KEY (namespace, key))")
+            conn.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, payload TEXT, created REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # Connections autocommit each statement; batches open one explicit write transaction
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, namespace, key, default=None):
+        row = self._conn().execute("SELECT value FROM kv WHERE namespace=? AND key=?", (namespace, key)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, namespace, key, value):
+        self._conn().execute(
+            "INSERT INTO kv (namespace, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET value=excluded.value",
+            (namespace, key, json.dumps(value))
+        )
+
+    def delete(self, namespace, key):
+        self._conn().execute("DELETE FROM kv WHERE namespace=? AND key=?", (namespace, key))
+
+    def set_many(self, namespace, values):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO kv (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(namespace, key) DO UPDATE SET value=excluded.value",
+                [(namespace, key, json.dumps(value)) for key, value in values.items()]
+            )
+
+    def delete_many(self, namespace, keys):
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM kv WHERE namespace=? AND key=?", [(namespace, key) for key in keys])
+
+    def items(self, namespace):
+        rows = self._conn().execute("SELECT key, value FROM kv WHERE namespace=? ORDER BY rowid", (namespace,))
+        return [(k, json.loads(v)) for k, v in rows]
+
+    def _insert_event(self, channel: str, payload: str):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT INTO events (channel, payload, created) VALUES (?, ?, ?)", (channel, payload, now))
+        conn.execute("DELETE FROM events WHERE created < ?", (now - EVENT_RETENTION,))
+
+    def _events_after(self, channel: str, last_id: int) -> List[tuple]:
+        return self._conn().execute(
+            "SELECT id, payload FROM events WHERE id > ? AND channel = ? ORDER BY id", (last_id, channel)
+        ).fetchall()
+
+    async def publish(self, channel, message):
+        await asyncio.to_thread(self._insert_event, channel, json.dumps(message))
+
+    async def subscribe(self, channel):
+        row = await asyncio.to_thread(lambda: self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone())
+        last_id = row[0]
+        while True:
+            for event_id, payload in await asyncio.to_thread(self._events_after, channel, last_id):
+                last_id = event_id
+                yield json.loads(payload)
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+class SharedMap(MutableMapping):
+    """Dict-like view over one backend namespace.
+
+    Values are copies: after mutating a value, assign it back so other workers see it.
+    """
+    def __init__(self, backend: StateBackend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+
+    def __getitem__(self, key):
+        value = self.backend.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.backend.set(self.namespace, key, value)
+
+    def __delitem__(self, key):
+        self.backend.delete(self.namespace, key)
+
+    def update(self, values: Dict[str, Any]):
+        self.backend.set_many(self.namespace, values)
+
+    def discard(self, keys: List[str]):
+        self.backend.delete_many(self.namespace, keys)
+
+    def __iter__(self):
+        return iter([k for k, _ in self.backend.items(self.namespace)])
+
+    def __len__(self):
+        return len(self.backend.items(self.namespace))
+
+    def __contains__(self, key):
+        return self.backend.get(self.namespace, key) is not None
+
+    def items(self):
+        return self.backend.items(self.namespace)
+
+    def values(self):
+        return [v for _, v in self.backend.items(self.namespace)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+def create_state_backend(default_path: Path, kind: Optional[str] = None) -> StateBackend:
+    kind = kind or STATE_BACKEND
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(Path(STATE_PATH) if STATE_PATH else default_path)
+    raise ValueError(f"Unknown state backend: {kind}")
@@ -1,11 +1,18 @@
 import os
 import json
+import time
 import logging
 from pathlib import Path
-from typing import Dict, List, Any
-import requests
-from bs4 import BeautifulSoup
-import google.generativeai as genai
+from typing import Dict, List, Any, Optional
+
+if not __package__:
+    # Run as a script (python brand_brain/synthesis.py): make the package-relative imports below resolve
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = "brand_brain"
+
+from .metrics import timed, instrument, record_llm
+from .snippets import SnippetCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,27 +20,34 @@ logger = logging.getLogger(__name__)
 
 class DeepScanner:
     """Autonomously scans filesystem to understand brand context and assets"""
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, snippets: Optional[SnippetCache] = None):
         self.root_path = Path(root_path)
+        self.snippets = snippets or SnippetCache()
         self.context_files = []
         self.assets = []
         self.code_fingerprints = []
 
+    @instrument("scan_walk")
     def scan(self) -> Dict[str, Any]:
         logger.info(f"🚀 Initializing Deep Scan of {self.root_path}")
+        # Start from a clean slate so repeated scans (one per manifest_brand call) don't accumulate
+        self.context_files, self.assets, self.code_fingerprints = [], [], []
         
         # Scan for context (READMEs, documentation, project summaries)
         for path in self.root_path.rglob('*.md'):
             if 'node_modules' not in str(path) and '.git' not in str(path):
                 try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read(2000) # Get first 2k chars for context
-                        self.context_files.append({
-                            "path": str(path.relative_to(self.root_path)),
-                            "snippet": content
-                        })
+                    # Highest-signal sections (or the cached summary), reused while the content is unchanged;
+                    # the cache times its own reads, and summaries are recorded as LLM calls
+                    entry = self.snippets.get(path)
+                    self.context_files.append({
+                        "path": str(path.relative_to(self.root_path)),
+                        "snippet": entry.get("summary") or entry["snippet"],
+                        "score": entry["score"]
+                    })
                 except:
                     continue
+        self.snippets.save()
 
         # Scan for assets (Images, Videos)
         asset_exts = ('.png', '.jpg', '.jpeg', '.mp4', '.mov', '.webp', '.gif')
@@ -51,7 +65,7 @@ class DeepScanner:
             dna_path = self.root_path / dna
             if dna_path.exists():
                 try:
-                    with open(dna_path, 'r', encoding='utf-8') as f:
+                    with timed("file_read"), open(dna_path, 'r', encoding='utf-8') as f:
                         self.code_fingerprints.append({
                             "file": dna,
                             "content": f.read(1000)
@@ -64,13 +78,22 @@ class DeepScanner:
             "asset_count": len(self.assets),
             "dna_captured": [f['file'] for f in self.code_fingerprints],
             "assets": self.assets[:20], # Sample for summary
-            "context_snippets": self.context_files[:5]
+            "context_snippets": [{"path": c["path"], "snippet": c["snippet"]} for c in self.ranked_context()[:5]]
         }
 
+    def ranked_context(self) -> List[Dict[str, Any]]:
+        """Context files by signal, shallow documents (the project README) winning ties"""
+        return sorted(self.context_files, key=lambda c: (-c["score"], c["path"].count(os.sep), c["path"]))
+
 class AssetIntelligence:
     """Analyzes URLs and external data to build brand knowledge"""
     @staticmethod
+    @instrument("scrape")
     def scrape_url(url: str) -> Dict[str, str]:
+        # Imported on first scrape: keeps requests/bs4 off the startup path
+        import requests
+        from bs4 import BeautifulSoup
+
         try:
             headers = {'User-Agent': 'Mozilla/5.0'}
             response = requests.get(url, headers=headers, timeout=10)
@@ -85,13 +108,36 @@ class AssetIntelligence:
 
 class BrandSynthesisEngine:
     """The master brain that manifested the brand from discoveries"""
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, snippets: Optional[SnippetCache] = None):
         self.root_path = root_path
-        self.scanner = DeepScanner(root_path)
+        self.scanner = DeepScanner(root_path, snippets)
         self.intelligence = AssetIntelligence()
         self.api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        self._model = None
+
+    @property
+    def model(self):
+        """Gemini model, created (and the SDK imported) on first synthesis"""
+        if self._model is None:
+            import google.generativeai as genai
+            endpoint = os.getenv("GEMINI_API_ENDPOINT")
+            if endpoint:  # e.g. benchmarks/fake_llm.py; REST so a plain http:// endpoint works
+                genai.configure(api_key=self.api_key, transport="rest", client_options={"api_endpoint": endpoint})
+            else:
+                genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel('gemini-1.5-pro')
+        return self._model
+
+    def summarize_doc(self, snippet: str) -> str:
+        """Three-sentence brand-relevant summary of a document snippet (cached by SnippetCache)"""
+        started = time.perf_counter()
+        response = self.model.generate_content(
+            "Summarize what this document says about the project, its mission and audience "
+            f"in at most three sentences. Plain text only.\n\n{snippet}")
+        usage = getattr(response, "usage_metadata", None)
+        record_llm("google", "gemini-1.5-pro", time.perf_counter() - started,
+                   getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
+        return response.text.strip()
 
     def manifest_brand(self, external_urls: List[str] = []) -> Dict[str, Any]:
         """Deep Synthesis: Scan, Scrap, and Manifest"""
@@ -125,14 +171,21 @@ class BrandSynthesisEngine:
         """
         
         try:
+            started = time.perf_counter()
             response = self.model.generate_content(synthesis_prompt)
+            usage = getattr(response, "usage_metadata", None)
+            record_llm("google", "gemini-1.5-pro", time.perf_counter() - started,
+                       getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
             result = json.loads(response.text.strip('`json\n'))
             
             # Persist to profile
             profile_path = Path(self.root_path) / "brand-engine" / "brand_brain" / "brand_profile.json"
             if profile_path.exists():
-                with open(profile_path, 'w') as f:
+                # Write then rename, so the engine's profile reload never sees a half-written file
+                tmp_path = profile_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, 'w') as f:
                     json.dump(result['brand_manifest_json'], f, indent=2)
+                os.replace(tmp_path, profile_path)
             
             return result
         except Exception as e:
@@ -140,7 +193,7 @@ class BrandSynthesisEngine:
             return {"error": str(e)}
 
 if __name__ == "__main__":
-    # Test manifestation
+    # Test manifestation: python brand_brain/synthesis.py (or python -m brand_brain.synthesis)
     engine = BrandSynthesisEngine(os.getcwd())
     print("🔮 Phoenix is manifesting your brand...")
     manifest = engine.manifest_brand()
@@ -0,0 +1,348 @@
+import os
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
+import aiofiles
+from .metrics import instrument
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("BUCKET_MAX_UPLOAD_MB", "2048")) * 1024 * 1024
+DUPLICATE_POLICY = os.getenv("BUCKET_DUPLICATE_POLICY", "reject")  # "reject" or "link"
+TEMP_PREFIX = ".upload-"
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload stream exceeds the configured bucket size limit"""
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentIndex:
+    """Maps sha256 digests to files already sitting in the bucket or processed/.
+
+    Digests are remembered per device + inode + size + mtime, so a file is only read once
+    even after `execute_workflow` moves it from the bucket into processed/. With `path` set,
+    that map is persisted as JSON and shared by workers and restarts. Files are hashed
+    outside the lock, so lookups never wait on a large read.
+    """
+    def __init__(self, *dirs: Path, path: Optional[Path] = None):
+        self.dirs = [Path(d) for d in dirs]
+        self.path = Path(path) if path else None
+        self._by_hash: Dict[str, Path] = {}
+        self._registered: Dict[str, Path] = {}  # registered while a refresh was listing the folders
+        self._known: Dict[Tuple[int, int, int, int], str] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._hashing: Dict[Tuple[int, int, int, int], threading.Lock] = {}
+        self._known.update(self._read_saved())
+
+    @staticmethod
+    def _key(st: os.stat_result) -> Tuple[int, int, int, int]:
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_saved(self) -> Dict[Tuple[int, int, int, int], str]:
+        if not self.path or not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            return {tuple(int(x) for x in key.split(':')): digest for key, digest in data.items()}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable content index {self.path}: {e}")
+            return {}
+
+    def save(self, live: Optional[set] = None):
+        """Writes the digest map, merged with what other workers saved; `live` drops files that are gone"""
+        if not self.path:
+            return
+        known = self._read_saved()
+        with self._lock:
+            known.update(self._known)
+        if live is not None:
+            known = {k: v for k, v in known.items() if k in live}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({':'.join(map(str, k)): v for k, v in known.items()}), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        """Re-lists the watched folders, hashing only files that were never seen before"""
+        with self._refresh_lock:
+            with self._lock:
+                self._registered = {}
+            entries = []
+            for d in self.dirs:
+                if not d.exists():
+                    continue
+                for entry in os.scandir(d):
+                    if not entry.is_file() or entry.name.startswith(TEMP_PREFIX):
+                        continue
+                    try:
+                        entries.append((self._key(entry.stat()), Path(entry.path)))
+                    except OSError:
+                        continue
+
+            with self._lock:
+                missing = [(key, path) for key, path in entries if key not in self._known]
+            hashed = {}
+            for key, path in missing:
+                try:
+                    hashed[key] = hash_file(path)
+                except OSError:
+                    continue
+
+            with self._lock:
+                self._known.update(hashed)
+                by_hash = {}
+                for key, path in entries:
+                    if key in self._known:
+                        by_hash.setdefault(self._known[key], path)
+                for digest, path in self._registered.items():
+                    by_hash.setdefault(digest, path)
+                self._by_hash = by_hash
+            if hashed:
+                self.save(live={key for key, _ in entries})
+
+    def lookup(self, digest: str) -> Optional[Path]:
+        path = self._by_hash.get(digest)
+        if path is not None and path.exists():
+            return path
+        return None
+
+    def digest_for(self, path: Path) -> str:
+        """Content hash of a single file, read from disk only if its inode/size/mtime is new"""
+        key = self._key(path.stat())
+        digest = self._known.get(key)
+        if digest is not None:
+            return digest
+        with self._lock:
+            hashing = self._hashing.setdefault(key, threading.Lock())
+        with hashing:  # concurrent callers for the same file wait for one read
+            digest = self._known.get(key)
+            if digest is None:
+                digest = hash_file(path)
+                with self._lock:
+                    self._known[key] = digest
+                    self._hashing.pop(key, None)
+                self.save()
+        return digest
+
+    def register(self, path: Path, digest: str):
+        with self._lock:
+            self._known[self._key(path.stat())] = digest
+            self._by_hash.setdefault(digest, path)
+            self._registered[digest] = path
+        self.save()
+
+
+class BucketUploader:
+    """Streams uploads into the bucket: chunked async writes, hash-while-writing, atomic rename, dedup.
+
+    `save_stream` parses a raw multipart body as it arrives, so each file is written to disk once and
+    the size limit is enforced before anything past it is stored. `save`/`save_many` accept file
+    objects that are already spooled (e.g. Starlette `UploadFile`).
+    """
+    def __init__(self, bucket_path: Path, processed_path: Path,
+                 max_bytes: int = MAX_UPLOAD_BYTES,
+                 duplicate_policy: str = DUPLICATE_POLICY,
+                 concurrency: int = 4, index_path: Optional[Path] = None):
+        self.bucket_path = Path(bucket_path)
+        self.processed_path = Path(processed_path)
+        self.max_bytes = max_bytes
+        self.duplicate_policy = duplicate_policy
+        self.index = ContentIndex(self.bucket_path, self.processed_path, path=index_path)
+        self.concurrency = concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self):
+        # asyncio primitives belong to one event loop; recreate them if the caller's loop changed
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._commit_lock = asyncio.Lock()
+
+    @staticmethod
+    def _safe_name(filename: Optional[str]) -> str:
+        name = Path(filename or "").name.strip()
+        if not name or name.startswith('.'):
+            name = f"upload-{uuid.uuid4().hex[:8]}{Path(name).suffix}"
+        return name
+
+    def _target_for(self, name: str, digest: str) -> Path:
+        """Never overwrite: a name already used in the bucket or processed/ gets a hash suffix"""
+        target = self.bucket_path / name
+        if target.exists() or (self.processed_path / name).exists():
+            p = Path(name)
+            target = self.bucket_path / f"{p.stem}-{digest[:8]}{p.suffix}"
+        return target
+
+    async def _stream_to_temp(self, upload, tmp_path: Path) -> Tuple[str, int]:
+        digest = hashlib.sha256()
+        size = 0
+        async with aiofiles.open(tmp_path, 'wb') as out:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise UploadTooLarge(f"{upload.filename} exceeds {self.max_bytes} bytes")
+                digest.update(chunk)
+                await out.write(chunk)
+        return digest.hexdigest(), size
+
+    def _temp_path(self) -> Path:
+        return self.bucket_path / f"{TEMP_PREFIX}{uuid.uuid4().hex}.part"
+
+    async def _commit(self, tmp_path: Path, filename: Optional[str], digest: str, size: int) -> Dict[str, Any]:
+        """Moves a fully written temp file into the bucket unless its content is already there"""
+        await asyncio.to_thread(self.index.refresh)
+        async with self._commit_lock:
+            return await asyncio.to_thread(self._place, tmp_path, filename, digest, size)
+
+    def _place(self, tmp_path: Path, filename: Optional[str], digest: str, size: int) -> Dict[str, Any]:
+        # File system work of a commit; runs in a worker thread while the commit lock is held
+        name = self._safe_name(filename)
+        existing = self.index.lookup(digest)
+        result = {"original": filename, "sha256": digest, "size": size}
+        if existing is not None:
+            tmp_path.unlink(missing_ok=True)
+            return self._handle_duplicate(existing, name, digest, result)
+
+        target = self._target_for(name, digest)
+        os.replace(tmp_path, target)
+        self.index.register(target, digest)
+        logger.info(f"📥 Bucket upload stored: {target.name} ({size} bytes)")
+        return {**result, "name": target.name, "status": "stored"}
+
+    def _rejected(self, filename: Optional[str], reason: str) -> Dict[str, Any]:
+        logger.warning(f"🚫 Bucket upload rejected: {reason}")
+        return {"original": filename, "name": self._safe_name(filename), "status": "rejected", "reason": reason}
+
+    @instrument("bucket_upload")
+    async def save(self, upload) -> Dict[str, Any]:
+        self._bind_loop()
+        tmp_path = self._temp_path()
+        try:
+            async with self._semaphore:
+                digest, size = await self._stream_to_temp(upload, tmp_path)
+            return await self._commit(tmp_path, upload.filename, digest, size)
+        except UploadTooLarge as e:
+            return self._rejected(upload.filename, str(e))
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @instrument("bucket_upload")
+    async def save_stream(self, content_type: str, body: AsyncIterator[bytes], field: str = "files") -> List[Dict[str, Any]]:
+        """Stores every `field` file part of a multipart/form-data body straight from the request stream"""
+        # Imported on first upload: keeps the parser off the startup path
+        from python_multipart.multipart import MultipartParser, parse_options_header
+
+        self._bind_loop()
+        ctype, params = parse_options_header(content_type)
+        if ctype != b"multipart/form-data" or not params.get(b"boundary"):
+            raise ValueError("Expected a multipart/form-data body")
+
+        # The parser's callbacks are synchronous; queue what they see and write it out asynchronously
+        events: List[Tuple[str, Any]] = []
+        header = [bytearray(), bytearray()]
+        headers: Dict[bytes, bytes] = {}
+
+        def on_header_end():
+            headers[bytes(header[0]).lower()] = bytes(header[1])
+            header[0].clear()
+            header[1].clear()
+
+        def on_headers_finished():
+            events.append(("begin", dict(headers)))
+            headers.clear()
+
+        parser = MultipartParser(params[b"boundary"], {
+            "on_header_field": lambda data, start, end: header[0].extend(data[start:end]),
+            "on_header_value": lambda data, start, end: header[1].extend(data[start:end]),
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": lambda data, start, end: events.append(("data", bytes(data[start:end]))),
+            "on_part_end": lambda: events.append(("end", None)),
+        })
+
+        results: List[Dict[str, Any]] = []
+        part: Optional[Dict[str, Any]] = None  # the file part currently being written
+
+        async def drain():
+            nonlocal part
+            for kind, value in events:
+                if kind == "begin":
+                    _, disposition = parse_options_header(value.get(b"content-disposition", b""))
+                    filename = disposition.get(b"filename")
+                    if disposition.get(b"name") == field.encode() and filename is not None:
+                        tmp_path = self._temp_path()
+                        part = {"filename": filename.decode("utf-8", "replace"), "tmp": tmp_path,
+                                "out": await aiofiles.open(tmp_path, "wb"), "digest": hashlib.sha256(),
+                                "size": 0, "error": None}
+                elif part is None:
+                    continue
+                elif kind == "data":
+                    part["size"] += len(value)
+                    if part["error"] is None and part["size"] > self.max_bytes:
+                        # Stop writing; the rest of this part is read off the wire and discarded
+                        part["error"] = f"{part['filename']} exceeds {self.max_bytes} bytes"
+                        await part["out"].close()
+                        part["tmp"].unlink(missing_ok=True)
+                    if part["error"] is None:
+                        part["digest"].update(value)
+                        await part["out"].write(value)
+                else:
+                    current, part = part, None
+                    if current["error"] is not None:
+                        results.append(self._rejected(current["filename"], current["error"]))
+                        continue
+                    await current["out"].close()
+                    try:
+                        results.append(await self._commit(current["tmp"], current["filename"],
+                                                          current["digest"].hexdigest(), current["size"]))
+                    finally:
+                        current["tmp"].unlink(missing_ok=True)
+            events.clear()
+
+        try:
+            async for chunk in body:
+                parser.write(chunk)
+                await drain()
+            parser.finalize()
+            await drain()
+        finally:
+            if part is not None:  # body ended (or failed) mid-part
+                await part["out"].close()
+                part["tmp"].unlink(missing_ok=True)
+        return results
+
+    def _handle_duplicate(self, existing: Path, name: str, digest: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        if self.duplicate_policy == "link" and existing.parent != self.bucket_path:
+            target = self._target_for(name, digest)
+            try:
+                os.link(existing, target)
+                self.index.register(target, digest)
+                logger.info(f"🔗 Bucket upload linked to existing content: {target.name} -> {existing.name}")
+                return {**result, "name": target.name, "status": "linked", "existing": existing.name}
+            except OSError as e:
+                logger.warning(f"Could not link {existing} into bucket: {e}")
+        logger.info(f"♻️ Bucket upload skipped, content already present as {existing.name}")
+        return {**result, "name": existing.name, "status": "duplicate", "existing": existing.name}
+
+    async def save_many(self, uploads: List[Any]) -> List[Dict[str, Any]]:
+        """Accepts many spooled files at once; copying is bounded by the uploader's concurrency"""
+        return await asyncio.gather(*(self.save(u) for u in uploads))
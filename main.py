@@ -1,19 +1,38 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Body, WebSocket, WebSocketDisconnect, BackgroundTasks, Request
+from fastapi.responses import FileResponse, Response, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from pathlib import Path
 import os
-import uvicorn
-import shutil
+import asyncio
 from typing import List, Dict, Any
 from brand_brain.orchestrator import MasterOrchestrator
+from brand_brain.derivatives import DerivativeUnavailable
+from brand_brain.state import StateBackend
+from brand_brain.metrics import REGISTRY, TraceMiddleware, instrument
 
-app = FastAPI(title="Harp * Star Media Mind Master")
+if __name__ == "__main__":
+    # `python main.py` only launches uvicorn, which imports this file again as `main` (once per
+    # worker). Stop here so the launcher never builds an orchestrator or opens state.db itself.
+    import uvicorn
+    # Workers share focus, proposals, platforms and swarm broadcasts through brand_brain/state.py
+    uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("PORT", "8000")),
+                workers=int(os.getenv("WEB_CONCURRENCY", "1")))
+    raise SystemExit(0)
+
+# Initialize Orchestrator
+# HARPSTAR_WORKSPACE_ROOT lets load tests and sandboxes point the app at another workspace
+ROOT_DIR = Path(os.getenv("HARPSTAR_WORKSPACE_ROOT", Path(__file__).parent.parent))
+orch = MasterOrchestrator(str(ROOT_DIR))
 
 # WebSocket Connection Manager
 class ConnectionManager:
-    def __init__(self):
+    """Holds this worker's sockets; broadcasts go through the shared state so every worker relays them"""
+    def __init__(self, state: StateBackend = None):
         self.active_connections: List[WebSocket] = []
+        self.state = state
+        self.relaying = False
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -23,13 +42,40 @@ class ConnectionManager:
         self.active_connections.remove(websocket)
 
     async def broadcast(self, message: dict):
+        if self.state is not None and self.relaying:
+            await self.state.publish("ws", message)
+        else:
+            await self.deliver(message)
+
+    @instrument("ws_broadcast")
+    async def deliver(self, message: dict):
         for connection in self.active_connections:
             try:
                 await connection.send_json(message)
             except Exception:
                 continue
 
-ws_manager = ConnectionManager()
+    async def relay(self):
+        """Delivers messages published by any worker to the sockets connected to this one"""
+        self.relaying = True
+        try:
+            async for message in self.state.subscribe("ws"):
+                await self.deliver(message)
+        finally:
+            self.relaying = False
+
+ws_manager = ConnectionManager(orch.state)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    relay = asyncio.create_task(ws_manager.relay())
+    # Hash files dropped into the bucket by hand now, not inside the first upload
+    warm_index = asyncio.create_task(asyncio.to_thread(orch.uploader.index.refresh))
+    yield
+    relay.cancel()
+    await orch.platforms.publisher.close()
+
+app = FastAPI(title="Harp * Star Media Mind Master", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -38,10 +84,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Initialize Orchestrator
-ROOT_DIR = Path(__file__).parent.parent
-orch = MasterOrchestrator(str(ROOT_DIR))
+app.add_middleware(TraceMiddleware)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -52,68 +95,93 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
 
-@app.get("/api/status")
-async def get_status():
+# Handlers that touch the shared state (blocking SQLite calls) run them in a worker thread
+def _status() -> Dict[str, Any]:
+    vbrain = orch.refresh_vbrain()
     return {
         "roots": orch.discovery_paths,
-        "agents": orch.vbrain.get("agent_integrations", {}),
-        "platforms": orch.platforms.platforms,
+        "agents": vbrain.get("agent_integrations", {}),
+        "platforms": orch.platforms.platforms.to_dict(),
         "bucket_path": str(orch.bucket_path),
         "global_focus": orch.global_focus,
-        "vbrain": orch.vbrain
+        "vbrain": vbrain
     }
 
+@app.get("/api/status")
+async def get_status():
+    return await asyncio.to_thread(_status)
+
 @app.post("/api/focus/update")
 async def update_focus(focus_data: dict = Body(...)):
     focus = focus_data.get("focus")
     if not focus:
         raise HTTPException(status_code=400, detail="Focus text required")
-    new_focus = orch.set_focus(focus)
+    new_focus = await asyncio.to_thread(orch.set_focus, focus)
     return {"status": "success", "focus": new_focus}
 
 @app.get("/api/system/discover")
 async def discover_roots():
-    roots = orch.discover_system_roots()
-    return {"status": "success", "suggested": roots}
+    candidates = await asyncio.to_thread(orch.discover_system_roots, True)
+    return {"status": "success", "suggested": [c["path"] for c in candidates], "scored": candidates}
 
 @app.post("/api/inspiration/add")
 async def add_inspiration(url: str = Body(..., embed=True)):
-    urls = orch.add_inspiration_url(url)
+    urls = await asyncio.to_thread(orch.add_inspiration_url, url)
     return {"status": "success", "inspiration_urls": urls}
 
 @app.post("/api/platforms/add")
 async def add_platform(name: str = Body(..., embed=True), config: dict = Body(..., embed=True)):
-    orch.platforms.add_custom_platform(name, config)
+    await asyncio.to_thread(orch.platforms.add_custom_platform, name, config)
     return {"status": "success"}
 
 @app.post("/api/bucket/upload")
-async def upload_to_bucket(files: List[UploadFile] = File(...)):
-    uploaded = []
-    for file in files:
-        file_path = orch.bucket_path / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        uploaded.append(file.filename)
-    return {"status": "success", "uploaded": uploaded}
+async def upload_to_bucket(request: Request, background_tasks: BackgroundTasks):
+    # Parsed from the raw stream (multipart field "files"), so each file is written to disk once
+    try:
+        results = await orch.uploader.save_stream(request.headers.get("content-type", ""), request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not results:
+        raise HTTPException(status_code=400, detail="No files in field 'files'")
+    uploaded = [r["name"] for r in results if r["status"] in ("stored", "linked")]
+    # Thumbnails/previews are rendered off the request path so the gallery finds them warm
+    background_tasks.add_task(orch.derivatives.warm, [orch.bucket_path / name for name in uploaded])
+    return {"status": "success", "uploaded": uploaded, "files": results}
+
+DERIVATIVE_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+
+@app.get("/api/bucket/preview/{variant}/{name}")
+async def get_asset_preview(variant: str, name: str, request: Request):
+    source = orch.find_asset(name)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    try:
+        path, etag, stat = await asyncio.to_thread(orch.derivatives.resolve, source, variant)
+    except DerivativeUnavailable as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    headers = {"ETag": etag, "Cache-Control": DERIVATIVE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers, stat_result=stat)
 
 @app.post("/api/workflow/propose")
 async def propose_workflows(background_tasks: BackgroundTasks, body: dict = Body(...)):
     user_spark = body.get("user_spark")
-    workflows = orch.process_bucket(user_spark=user_spark)
+    workflows = await asyncio.to_thread(orch.process_bucket, user_spark)
     if workflows:
         # Trigger real-time swarm debate in the background
         asset_name = workflows[0]['asset']
-        focus = orch.global_focus
+        focus = await asyncio.to_thread(lambda: orch.global_focus)
         background_tasks.add_task(orch.swarm.collaborate, asset_name, focus, ws_manager, user_spark)
     return {"status": "success", "workflows": workflows}
 
 @app.get("/api/workflow/pending")
 async def get_pending_workflows():
-    return {"workflows": list(orch.active_workflows.values())}
+    return {"workflows": await asyncio.to_thread(orch.pending_workflows)}
 
 @app.post("/api/workflow/execute/{workflow_id}")
 async def execute_workflow(workflow_id: str):
-    result = orch.execute_workflow(workflow_id)
+    result = await orch.execute_workflow(workflow_id)
     if result.get("status") == "error":
         raise HTTPException(status_code=404, detail=result["message"])
     return result
@@ -123,8 +191,8 @@ async def add_root(path_data: dict = Body(...)):
     path = path_data.get("path")
     if not path:
         raise HTTPException(status_code=400, detail="Path is required")
-    orch.add_discovery_path(path)
-    return {"status": "success", "roots": orch.discovery_paths}
+    await asyncio.to_thread(orch.add_discovery_path, path)
+    return {"status": "success", "roots": await asyncio.to_thread(lambda: orch.discovery_paths)}
 
 @app.post("/api/sync")
 async def execute_sync():
@@ -132,9 +200,10 @@ async def execute_sync():
     orch.sync_dna()
     return {"status": "success"}
 
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 app.mount("/bucket", StaticFiles(directory=str(orch.bucket_path)), name="bucket")
 app.mount("/processed", StaticFiles(directory=str(orch.processed_path)), name="processed")
 app.mount("/", StaticFiles(directory="public", html=True), name="public")
-
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,19 +1,42 @@
+import io
 import os
+import asyncio
 import json
 import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from starlette.datastructures import UploadFile
 from brand_brain.orchestrator import MasterOrchestrator
+from brand_brain.state import MemoryStateBackend
+from brand_brain.snippets import extract_snippet
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SYSTEM_CHECK")
 
+class _WebhookStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for a platform webhook: fails each key's first attempt with 503"""
+    seen = {}
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        key = self.headers.get("Idempotency-Key")
+        attempts = self.seen.get((self.path, key), 0) + 1
+        self.seen[(self.path, key)] = attempts
+        self.send_response(503 if attempts == 1 else 200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
 def test_logic():
     print("\n--- Harp * Star Media Mind Master: Logic Health Check ---")
     
     # 1. Initialize Orchestrator
     try:
-        orch = MasterOrchestrator(os.getcwd())
+        # In-memory state: the check must not leave its focus and test platforms in brand_brain/state.db
+        orch = MasterOrchestrator(os.getcwd(), state=MemoryStateBackend())
         print("[Logic] MasterOrchestrator Initialized successfully.")
     except Exception as e:
         print(f"[Logic] Orchestrator Init Failed: {e}")
@@ -56,6 +79,67 @@ def test_logic():
         else:
             print("[Security] Security strings missing from UI!")
 
+    # 7. Test Streaming Bucket Uploads (hash + dedup)
+    payload = os.urandom(256 * 1024)
+    first = asyncio.run(orch.uploader.save(UploadFile(io.BytesIO(payload), filename="health_check.mp4")))
+    again = asyncio.run(orch.uploader.save(UploadFile(io.BytesIO(payload), filename="health_check_copy.mp4")))
+    if first["status"] == "stored" and again["status"] == "duplicate" and again["existing"] == first["name"]:
+        print(f"[Bucket] Streaming upload stored {first['name']} and deduplicated the re-upload.")
+    else:
+        print(f"[Bucket] Upload dedup failed: {first} / {again}")
+    (orch.bucket_path / first["name"]).unlink(missing_ok=True)
+
+    # 7b. Same through save_stream, the endpoint's path: a multipart body parsed as it arrives
+    boundary = "healthcheckboundary"
+    payload = os.urandom(256 * 1024)
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{name}"\r\n\r\n'.encode()
+        + payload + b"\r\n" for name in ("health_stream.mp4", "health_stream_copy.mp4")
+    ) + f"--{boundary}--\r\n".encode()
+
+    async def chunks():
+        for start in range(0, len(body), 64 * 1024):
+            yield body[start:start + 64 * 1024]
+
+    streamed = asyncio.run(orch.uploader.save_stream(f"multipart/form-data; boundary={boundary}", chunks()))
+    if [r["status"] for r in streamed] == ["stored", "duplicate"] and streamed[0]["size"] == len(payload):
+        print(f"[Bucket] Multipart stream stored {streamed[0]['name']} and deduplicated the second part.")
+    else:
+        print(f"[Bucket] Multipart stream upload failed: {streamed}")
+    if streamed and streamed[0].get("status") == "stored":
+        (orch.bucket_path / streamed[0]["name"]).unlink(missing_ok=True)
+
+    # 8. Test Publish Fan-out against local webhook stand-ins (retry + idempotency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WebhookStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    for name in ("hook_a", "hook_b"):
+        orch.platforms.add_custom_platform(name, {"webhook_url": f"{base}/{name}", "rate_per_sec": 20})
+
+    async def ignite_twice():
+        content = {"title": "Health Check", "body": "Fan-out"}
+        first = await orch.platforms.post_many(["hook_a", "hook_b"], content, scope="health")
+        second = await orch.platforms.post_many(["hook_a", "hook_b"], content, scope="health")
+        await orch.platforms.publisher.close()
+        return first, second
+
+    first, second = asyncio.run(ignite_twice())
+    server.shutdown()
+    delivered = all(r["status"] == "success" for r in first.values())
+    deduped = all(r.get("deduplicated") for r in second.values()) and len(_WebhookStandIn.seen) == 2
+    if delivered and deduped:
+        print("[Automation] Publish fan-out retried, delivered once per platform, and deduplicated re-ignition.")
+    else:
+        print(f"[Automation] Publish fan-out failed: {first} / {second}")
+
+    # 9. Test Markdown Context Snippets (the README's overview must survive the budget)
+    with open("README.md", "r", encoding="utf-8") as f:
+        snippet, _ = extract_snippet(f.read())
+    if "Project Overview" in snippet and "Design Philosophy" in snippet:
+        print("[Context] README snippet keeps the project overview and design philosophy.")
+    else:
+        print(f"[Context] README snippet dropped the overview: {snippet[:200]!r}")
+
     print("\n--- Logic Manifestation: FULLY OPERATIONAL ---\n")
 
 if __name__ == "__main__":
@@ -11,8 +11,6 @@ sys.path.append(str(BRAND_ENGINE_DIR))
 # Also add the actual root for scraping context
 ROOT_DIR = BRAND_ENGINE_DIR.parent
 
-from brand_brain.synthesis import BrandSynthesisEngine
-from brand_brain.engine import BrandContentEngine
 from brand_brain.orchestrator import MasterOrchestrator
 
 st.set_page_config(page_title="Phoenix Master Terminal", page_icon="🧬", layout="wide")